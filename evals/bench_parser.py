@@ -0,0 +1,74 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src.parser import _split_sections
+
+
+HEADINGS = [
+    "Problem",
+    "Objectives",
+    "Functional Requirements",
+    "Non-Functional Requirements",
+    "Constraints",
+    "Dependencies",
+    "Assumptions",
+]
+
+
+def synthetic_brd(target_bytes: int, markdown: bool) -> str:
+    parts = []
+    size = 0
+    block = 0
+    while size < target_bytes:
+        for number, heading in enumerate(HEADINGS, start=1):
+            title = f"{number}. {heading}"
+            line = f"## {title}\n" if markdown else f"{title}:\n"
+            body = "".join(
+                f"- Item {block}.{number}.{item}: the system shall handle case {item} reliably\n"
+                for item in range(12)
+            )
+            notes = f"### Notes {block}.{number}\nFree-form discussion without section keywords.\n" if markdown else ""
+            chunk = line + body + notes + "\n"
+            parts.append(chunk)
+            size += len(chunk)
+        block += 1
+    return "".join(parts)
+
+
+def time_split(text: str, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _split_sections(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heading matcher scaling benchmark")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for markdown in (False, True):
+        label = "markdown" if markdown else "plain"
+        print(f"{label} headings:")
+        baseline = None
+        for size_mb in args.sizes_mb:
+            text = synthetic_brd(int(size_mb * 1024 * 1024), markdown)
+            seconds = time_split(text, args.repeats)
+            per_mb = seconds / size_mb
+            baseline = baseline or per_mb
+            print(
+                f"  {size_mb:>5.1f} MB: {seconds * 1000:8.1f} ms "
+                f"({size_mb / seconds:7.1f} MB/s, {per_mb / baseline:4.2f}x cost per MB vs smallest)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from jsonschema import ValidationError, validate
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src import schema_registry
+from src.fallback import (
+    architecture_fallback,
+    eng_plan_fallback,
+    poc_fallback,
+    schedule_fallback,
+    tech_stack_fallback,
+)
+
+
+SCHEMAS = ROOT / "schemas"
+
+
+def sample_artifacts() -> dict:
+    return {
+        "engineering_plan": eng_plan_fallback(),
+        "schedule_estimate": schedule_fallback(),
+        "solution_architecture": architecture_fallback(),
+        "poc_plan": poc_fallback(),
+        "tech_stack_recommendations": tech_stack_fallback(),
+    }
+
+
+def per_call(artifacts: dict) -> list:
+    # The path the UI and validate_e2e used before the registry existed.
+    results = []
+    for key, value in artifacts.items():
+        schema = json.loads((SCHEMAS / schema_registry.ARTIFACT_SCHEMAS[key]).read_text(encoding="utf-8"))
+        try:
+            validate(instance=value, schema=schema)
+            results.append(True)
+        except ValidationError:
+            results.append(False)
+    return results
+
+
+def registry(artifacts: dict) -> list:
+    return [schema_registry.is_valid(key, value) for key, value in artifacts.items()]
+
+
+def time_it(fn, artifacts: dict, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(artifacts)
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema validation benchmark")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    artifacts = sample_artifacts()
+    assert per_call(artifacts) == registry(artifacts)
+    schema_registry.get_validator("engineering_plan")
+
+    old = time_it(per_call, artifacts, args.repeats)
+    new = time_it(registry, artifacts, args.repeats)
+    print(f"per-call load + validate: {old * 1000:8.3f} ms per artifact set")
+    print(f"registry is_valid:        {new * 1000:8.3f} ms per artifact set ({old / new:5.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+parser = argparse.ArgumentParser(description="Offline benchmark suite for the local hot paths")
+parser.add_argument("--iterations", type=int, default=200)
+parser.add_argument("--pipeline-iterations", type=int, default=50)
+parser.add_argument("--latency", default="fixed:0", help="Mock LLM latency, e.g. fixed:0, uniform:20:80, lognormal:50:0.5")
+parser.add_argument("--error-rate", type=float, default=0.0)
+parser.add_argument("--seed", type=int, default=7)
+parser.add_argument("--output", help="Write results as JSON (e.g. to keep as a baseline)")
+parser.add_argument("--baseline", help="Fail if any p50 regresses beyond --tolerance against this JSON file")
+parser.add_argument("--tolerance", type=float, default=0.25)
+args = parser.parse_args()
+
+# Configuration is read at import time, so the mock backend has to be selected first.
+os.environ["LLM_BACKEND"] = "mock"
+os.environ["LLM_CACHE_MODE"] = "bypass"
+os.environ["MOCK_LLM_LATENCY"] = args.latency
+os.environ["MOCK_LLM_ERROR_RATE"] = str(args.error_rate)
+os.environ["MOCK_LLM_SEED"] = str(args.seed)
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+os.environ.setdefault("LLM_BACKOFF_BASE_SECONDS", "0.01")
+
+from src import schema_registry
+from src.batch import percentile
+from src.guardrails import apply_guardrails
+from src.json_extract import extract_json
+from src.mock_llm import CANNED_RESPONSES
+from src.orchestrator import STAGES, run_pipeline
+from src.parser import parse_brd_text
+
+
+SAMPLES = sorted((ROOT / "sample_inputs").glob("*.md")) + sorted((ROOT / "evals" / "data").glob("brd_*.md"))
+
+
+def measure(fn, iterations: int) -> list:
+    fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: list, units: float = 0) -> dict:
+    summary = {
+        "iterations": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+    }
+    if units:
+        summary["mb_per_second"] = round(units / statistics.fmean(samples) / (1024 * 1024), 2)
+    return summary
+
+
+def bench_parser() -> dict:
+    texts = [path.read_text(encoding="utf-8") for path in SAMPLES]
+    total_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    def run():
+        for text in texts:
+            parse_brd_text(text, use_llm=False)
+
+    return summarize(measure(run, args.iterations), units=total_bytes)
+
+
+def bench_extract_json() -> dict:
+    bodies = [json.dumps(value) for value in CANNED_RESPONSES.values()]
+    # Models sometimes wrap the object in prose or a code fence.
+    bodies += [f"Here is the JSON:\n```json\n{body}\n```\nDone." for body in bodies]
+
+    def run():
+        for body in bodies:
+            extract_json(body)
+
+    return summarize(measure(run, args.iterations))
+
+
+def bench_guardrails() -> dict:
+    outputs = [(copy.deepcopy(CANNED_RESPONSES[name]), STAGES[name]["required_keys"]) for name in STAGES]
+
+    def run():
+        for output, required_keys in outputs:
+            apply_guardrails(dict(output), required_keys)
+
+    return summarize(measure(run, args.iterations))
+
+
+def bench_schema_validation() -> dict:
+    artifacts = {name: CANNED_RESPONSES[name] for name in STAGES}
+
+    def run():
+        for name, value in artifacts.items():
+            schema_registry.validation_summary(name, value)
+
+    return summarize(measure(run, args.iterations))
+
+
+def bench_pipeline() -> dict:
+    brd_sections = parse_brd_text((ROOT / "evals" / "data" / "brd_001.md").read_text(encoding="utf-8"))
+    scheduling = []
+
+    def run():
+        graph = run_pipeline(brd_sections)["_debug"]["graph"]
+        # Wall time not explained by the slowest dependency chain is the orchestrator's own cost.
+        scheduling.append(max(graph["wall_seconds"] - graph["critical_path_seconds"], 0.0))
+
+    summary = summarize(measure(run, args.pipeline_iterations))
+    scheduling = scheduling[1:]
+    summary["scheduling_p50_ms"] = round(percentile(scheduling, 50) * 1000, 4)
+    summary["scheduling_p95_ms"] = round(percentile(scheduling, 95) * 1000, 4)
+    return summary
+
+
+BENCHMARKS = {
+    "parser": bench_parser,
+    "extract_json": bench_extract_json,
+    "guardrails": bench_guardrails,
+    "schema_validation": bench_schema_validation,
+    "pipeline": bench_pipeline,
+}
+
+
+def main() -> int:
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        results[name] = bench()
+        row = results[name]
+        extra = f"  {row['mb_per_second']:8.2f} MB/s" if "mb_per_second" in row else ""
+        if "scheduling_p50_ms" in row:
+            extra = f"  scheduling p50 {row['scheduling_p50_ms']:.3f} ms p95 {row['scheduling_p95_ms']:.3f} ms"
+        print(
+            f"{name:<18} p50 {row['p50_ms']:9.3f} ms  p95 {row['p95_ms']:9.3f} ms  "
+            f"p99 {row['p99_ms']:9.3f} ms{extra}"
+        )
+    print(f"(mock latency {args.latency}, error rate {args.error_rate})")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = [
+            f"{name}: p50 {results[name]['p50_ms']} ms vs baseline {baseline[name]['p50_ms']} ms"
+            for name in results
+            if name in baseline and results[name]["p50_ms"] > baseline[name]["p50_ms"] * (1 + args.tolerance)
+        ]
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,16 +2,14 @@ import json
 import sys
 from pathlib import Path
 
-from jsonschema import validate, ValidationError
-
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
+from src import schema_registry
 from src.parser import parse_brd_text
 
 
 SAMPLE_DIR = ROOT / "sample_inputs"
-SCHEMA_PATH = ROOT / "schemas" / "brd_sections.schema.json"
 RESULTS_PATH = Path(__file__).resolve().parent / "results" / "parser_batch_results.json"
 
 
@@ -30,25 +28,22 @@ def compute_coverage(brd_sections: dict) -> dict:
 
 
 def main():
-    schema = json.loads(SCHEMA_PATH.read_text(encoding="utf-8"))
     results = []
     for path in sorted(SAMPLE_DIR.glob("sample_brd_*.md")):
         text = path.read_text(encoding="utf-8")
         parsed = parse_brd_text(text)
         coverage = compute_coverage(parsed)
-        valid = True
-        error = ""
-        try:
-            validate(instance=parsed, schema=schema)
-        except ValidationError as exc:
-            valid = False
-            error = str(exc).splitlines()[0]
+        validation = schema_registry.validation_summary("brd_sections.schema.json", parsed)
+        valid = validation["valid"]
+        error = validation["error"]
         results.append(
             {
                 "file": path.name,
                 "schema_valid": valid,
                 "schema_error": error,
                 "llm_fallback_used": parsed.get("_llm_fallback_used", False),
+                "strategy": parsed.get("_debug", {}).get("strategy", ""),
+                "section_sources": parsed.get("_debug", {}).get("section_sources", {}),
                 "coverage": coverage,
             }
         )
@@ -4,30 +4,16 @@ import sys
 import time
 from pathlib import Path
 
-from jsonschema import ValidationError, validate
-
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from src.orchestrator import run_pipeline
+from src import schema_registry
+from src.orchestrator import STAGES, run_pipeline
 from src.parser import parse_brd_text
 
 BASE = Path(__file__).resolve().parent
-SCHEMAS = BASE.parent / "schemas"
 DEFAULT_DATA_DIR = BASE / "data"
 
-ARTIFACT_SCHEMAS = {
-    "engineering_plan": "engineering_plan.schema.json",
-    "schedule_estimate": "schedule_estimate.schema.json",
-    "solution_architecture": "solution_architecture.schema.json",
-    "poc_plan": "poc_plan.schema.json",
-    "tech_stack_recommendations": "tech_stack.schema.json",
-}
-
-
-def load_schema(name: str) -> dict:
-    return json.loads((SCHEMAS / name).read_text(encoding="utf-8"))
-
 
 def score_list(pred, gold):
     pred_set = {p.strip().lower() for p in pred}
@@ -67,11 +53,8 @@ def iter_cases(data_dir: Path, pattern: str, explicit_cases: list[str]) -> list[
 
 
 def validate_instance(instance: dict, schema_name: str) -> str | None:
-    try:
-        validate(instance=instance, schema=load_schema(schema_name))
-        return None
-    except ValidationError as exc:
-        return str(exc)
+    error = schema_registry.first_error(schema_name, instance)
+    return str(error) if error is not None else None
 
 
 def main() -> int:
@@ -137,8 +120,9 @@ def main() -> int:
 
             artifacts = run_pipeline(parsed)
             pipeline_errors = []
-            for key, schema_name in ARTIFACT_SCHEMAS.items():
-                error = validate_instance(artifacts.get(key, {}), schema_name)
+            for key in STAGES:
+                # schema_registry resolves artifact keys to their schema files.
+                error = validate_instance(artifacts.get(key, {}), key)
                 if error:
                     pipeline_errors.append(f"{key}: {error}")
             if pipeline_errors:
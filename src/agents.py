@@ -1,10 +1,7 @@
-import json
-import re
 from pathlib import Path
 
-from openai import OpenAI
-
-from src.config import OPENAI_API_KEY, OPENAI_MODEL, SYSTEM_PROMPT
+from src import draft, schema_registry
+from src.config import PIPELINE_DEGRADED_FALLBACK
 from src.fallback import (
     eng_plan_fallback,
     schedule_fallback,
@@ -12,14 +9,9 @@ from src.fallback import (
     poc_fallback,
     tech_stack_fallback,
 )
-
-
-def _client():
-    if not OPENAI_API_KEY:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-    if OPENAI_API_KEY in {"YOUR_KEY", "sk-your-key"} or not OPENAI_API_KEY.startswith("sk-"):
-        raise RuntimeError("OPENAI_API_KEY looks invalid. Update your .env with a real key.")
-    return OpenAI(api_key=OPENAI_API_KEY)
+from src.json_extract import extract_json
+from src.llm import complete_async, run_sync
+from src.projection import compact_json
 
 
 def _load_prompt(path: str) -> str:
@@ -29,75 +21,139 @@ def _load_prompt(path: str) -> str:
     return ""
 
 
-def _extract_json(text: str) -> dict:
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        match = re.search(r"\{.*\}", text, flags=re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        raise
-
-
-def _chat(prompt: str, fallback: dict) -> dict:
+async def _chat_async(prompt: str, fallback, on_partial=None, schema_name: str | None = None) -> dict:
+    """Complete ``prompt``; on failure return ``fallback()`` (only built then) with ``_error``."""
+    schema = schema_registry.get_schema(schema_name) if schema_name else None
     try:
-        client = _client()
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt},
-            ],
+        return await complete_async(
+            prompt,
             temperature=0.3,
+            parse=extract_json,
+            on_partial=on_partial,
+            schema=schema,
+            schema_name=schema_name or "response",
         )
-        content = response.choices[0].message.content or "{}"
-        return _extract_json(content)
     except Exception as exc:
-        error_payload = {"_error": str(exc)}
-        error_payload.update(fallback)
+        error_payload = {"_error": str(exc) or type(exc).__name__}
+        error_payload.update(fallback())
         return error_payload
 
 
-def eng_plan_generator(brd_sections: dict) -> dict:
+def degraded_fallback(skeleton, draft_artifact, payload: dict) -> dict:
+    """What a failed agent returns: a heuristic draft (default) or the empty skeleton."""
+    if PIPELINE_DEGRADED_FALLBACK == "draft":
+        try:
+            return {"_fallback": "draft", **draft_artifact(payload)}
+        except Exception:
+            # A draft must never turn a failed stage into a failed run.
+            pass
+    return skeleton()
+
+
+def _chat(prompt: str, fallback) -> dict:
+    return run_sync(_chat_async(prompt, fallback))
+
+
+def _eng_plan_prompt(brd_sections: dict) -> str:
     template = _load_prompt("prompts/planning/eng_plan_generator.prompt.md")
-    prompt = (
+    return (
         f"{template}\n\n"
-        f"Input BRD sections (JSON): {json.dumps(brd_sections)}"
+        f"Input BRD sections (JSON): {compact_json(brd_sections)}"
     )
-    return _chat(prompt, eng_plan_fallback())
 
 
-def schedule_estimator(plan: dict) -> dict:
+def _schedule_prompt(plan: dict) -> str:
     template = _load_prompt("prompts/planning/schedule_estimator.prompt.md")
-    prompt = (
+    return (
         f"{template}\n\n"
-        f"Input engineering plan JSON: {json.dumps(plan)}"
+        f"Input engineering plan JSON: {compact_json(plan)}"
     )
-    return _chat(prompt, schedule_fallback())
 
 
-def solution_architect(brd_sections: dict) -> dict:
+def _architecture_prompt(brd_sections: dict) -> str:
     template = _load_prompt("prompts/design/solution_architect.prompt.md")
-    prompt = (
+    return (
         f"{template}\n\n"
-        f"Input BRD sections: {json.dumps(brd_sections)}"
+        f"Input BRD sections: {compact_json(brd_sections)}"
     )
-    return _chat(prompt, architecture_fallback())
 
 
-def poc_planner(architecture: dict) -> dict:
+def _poc_prompt(architecture: dict) -> str:
     template = _load_prompt("prompts/design/poc_planner.prompt.md")
-    prompt = (
+    return (
         f"{template}\n\n"
-        f"Input architecture JSON: {json.dumps(architecture)}"
+        f"Input architecture JSON: {compact_json(architecture)}"
     )
-    return _chat(prompt, poc_fallback())
 
 
-def tech_stack_recommender(brd_sections: dict) -> dict:
+def _tech_stack_prompt(brd_sections: dict) -> str:
     template = _load_prompt("prompts/design/tech_stack_recommender.prompt.md")
-    prompt = (
+    return (
         f"{template}\n\n"
-        f"Input BRD sections: {json.dumps(brd_sections)}"
+        f"Input BRD sections: {compact_json(brd_sections)}"
+    )
+
+
+async def eng_plan_generator_async(brd_sections: dict, on_partial=None) -> dict:
+    return await _chat_async(
+        _eng_plan_prompt(brd_sections),
+        lambda: degraded_fallback(eng_plan_fallback, draft.draft_engineering_plan, brd_sections),
+        on_partial,
+        "engineering_plan",
     )
-    return _chat(prompt, tech_stack_fallback())
+
+
+async def schedule_estimator_async(plan: dict, on_partial=None) -> dict:
+    return await _chat_async(
+        _schedule_prompt(plan),
+        lambda: degraded_fallback(schedule_fallback, draft.draft_schedule, plan),
+        on_partial,
+        "schedule_estimate",
+    )
+
+
+async def solution_architect_async(brd_sections: dict, on_partial=None) -> dict:
+    return await _chat_async(
+        _architecture_prompt(brd_sections),
+        lambda: degraded_fallback(architecture_fallback, draft.draft_architecture, brd_sections),
+        on_partial,
+        "solution_architecture",
+    )
+
+
+async def poc_planner_async(architecture: dict, on_partial=None) -> dict:
+    return await _chat_async(
+        _poc_prompt(architecture),
+        lambda: degraded_fallback(poc_fallback, draft.draft_poc, architecture),
+        on_partial,
+        "poc_plan",
+    )
+
+
+async def tech_stack_recommender_async(brd_sections: dict, on_partial=None) -> dict:
+    return await _chat_async(
+        _tech_stack_prompt(brd_sections),
+        lambda: degraded_fallback(tech_stack_fallback, draft.draft_tech_stack, brd_sections),
+        on_partial,
+        "tech_stack_recommendations",
+    )
+
+
+def eng_plan_generator(brd_sections: dict) -> dict:
+    return run_sync(eng_plan_generator_async(brd_sections))
+
+
+def schedule_estimator(plan: dict) -> dict:
+    return run_sync(schedule_estimator_async(plan))
+
+
+def solution_architect(brd_sections: dict) -> dict:
+    return run_sync(solution_architect_async(brd_sections))
+
+
+def poc_planner(architecture: dict) -> dict:
+    return run_sync(poc_planner_async(architecture))
+
+
+def tech_stack_recommender(brd_sections: dict) -> dict:
+    return run_sync(tech_stack_recommender_async(brd_sections))
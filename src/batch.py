@@ -0,0 +1,171 @@
+import asyncio
+import glob
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from src import runstore, singleflight
+from src.orchestrator import STAGES, resolve_mode, run_pipeline_async
+from src.output import open_text, select_profile
+from src.stream_parser import parse_brd_stream_async
+
+
+BRD_SUFFIXES = {".md", ".txt"}
+
+
+def iter_inputs(patterns: list):
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern).expanduser()
+        if path.is_dir():
+            candidates = (item for item in sorted(path.iterdir()) if item.suffix in BRD_SUFFIXES)
+        else:
+            candidates = (Path(item) for item in sorted(glob.iglob(str(path), recursive=True)))
+        for candidate in candidates:
+            key = str(candidate.resolve())
+            if candidate.is_file() and key not in seen:
+                seen.add(key)
+                yield candidate
+
+
+def completed_inputs(output_path: Path) -> set:
+    done = set()
+    if not output_path.exists():
+        return done
+    try:
+        with open_text(output_path) as handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") == "ok" and not record.get("agent_errors"):
+                    done.add(record.get("input"))
+    except EOFError:
+        # A gzip stream cut short by an interrupted run; earlier lines still count.
+        pass
+    return done
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def _process(
+    path: Path,
+    profile: str = "full",
+    mode: str = "llm",
+    checkpoint: bool = False,
+    deadline_seconds: float | None = None,
+) -> dict:
+    start = time.perf_counter()
+
+    async def execute() -> dict:
+        if checkpoint:
+            return await runstore.run_checkpointed_async(
+                path.read_text(encoding="utf-8"), mode=mode, deadline_seconds=deadline_seconds
+            )
+        with path.open(encoding="utf-8") as handle:
+            brd_sections = await parse_brd_stream_async(handle, use_llm=mode == "llm")
+        return await run_pipeline_async(brd_sections, mode=mode, deadline_seconds=deadline_seconds)
+
+    try:
+        # Duplicate BRDs in flight at the same time share one pipeline run.
+        artifacts, shared = await singleflight.runs.do((_file_hash(path), mode), execute)
+    except Exception as exc:
+        return {
+            "input": str(path.resolve()),
+            "status": "error",
+            "error": str(exc),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+    agent_errors = [name for name in STAGES if artifacts.get(name, {}).get("_error")]
+    return {
+        "input": str(path.resolve()),
+        "status": "ok",
+        "agent_errors": agent_errors,
+        "coalesced": shared,
+        "seconds": round(time.perf_counter() - start, 3),
+        "artifacts": select_profile(artifacts, profile),
+    }
+
+
+async def run_batch(
+    patterns: list,
+    output_path: Path,
+    workers: int = 4,
+    resume: bool = True,
+    profile: str = "full",
+    mode: str | None = None,
+    checkpoint: bool = False,
+    deadline_seconds: float | None = None,
+) -> dict:
+    """Process BRDs concurrently, appending one JSON line per BRD as it finishes.
+
+    ``profile`` selects what each record keeps (see src/output.py); a ``.gz``
+    output path is written as gzip. ``mode`` is the pipeline mode (llm/draft).
+    With ``checkpoint`` every stage is saved to the run store, so a BRD that was
+    interrupted mid-pipeline resumes from its completed stages on the next run.
+    ``deadline_seconds`` bounds each BRD's pipeline run (see run_pipeline_async).
+    """
+    mode = resolve_mode(mode)
+    done = completed_inputs(output_path) if resume else set()
+    work = asyncio.Queue(maxsize=max(workers, 1) * 2)
+    latencies = []
+    summary = {"processed": 0, "failed": 0, "agent_errors": 0, "skipped": 0, "coalesced": 0}
+    start = time.perf_counter()
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open_text(output_path, "a" if resume else "w") as handle:
+
+        async def worker():
+            while True:
+                path = await work.get()
+                if path is None:
+                    return
+                record = await _process(path, profile, mode, checkpoint, deadline_seconds)
+                json.dump(record, handle, separators=(",", ":"))
+                handle.write("\n")
+                handle.flush()
+                summary["processed"] += 1
+                latencies.append(record["seconds"])
+                if record.get("coalesced"):
+                    summary["coalesced"] += 1
+                if record["status"] != "ok":
+                    summary["failed"] += 1
+                elif record["agent_errors"]:
+                    summary["agent_errors"] += 1
+
+        tasks = [asyncio.create_task(worker()) for _ in range(max(workers, 1))]
+        for path in iter_inputs(patterns):
+            if str(path.resolve()) in done:
+                summary["skipped"] += 1
+                continue
+            await work.put(path)
+        for _ in tasks:
+            await work.put(None)
+        await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - start
+    summary.update(
+        {
+            "elapsed_seconds": round(elapsed, 3),
+            "brds_per_minute": round(summary["processed"] / elapsed * 60, 2) if elapsed else 0.0,
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+        }
+    )
+    return summary
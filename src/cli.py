@@ -1,5 +1,4 @@
 import argparse
-import json
 import sys
 from pathlib import Path
 
@@ -8,23 +7,161 @@ from dotenv import load_dotenv
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from src.parser import parse_brd_text
-from src.orchestrator import run_pipeline
+from src import cache, runstore, telemetry
+from src.batch import run_batch
+from src.config import PIPELINE_MODE
+from src.llm import run_sync
+from src.orchestrator import PIPELINE_MODES, resolve_mode, run_pipeline
+from src.output import OUTPUT_PROFILES, ArtifactWriter, open_text, read_json
+from src.stream_parser import parse_brd_stream
+
+
+def batch_main(argv: list):
+    parser = argparse.ArgumentParser(
+        prog="cli.py batch",
+        description="Process a directory or glob of BRDs concurrently into JSONL",
+    )
+    parser.add_argument("inputs", nargs="+", help="BRD directories or glob patterns (e.g. 'sample_inputs/*.md')")
+    parser.add_argument("--output", default="output.jsonl", help="Output JSONL path (appended to)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of BRDs processed concurrently")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite output instead of skipping BRDs already done")
+    parser.add_argument("--cache", choices=cache.CACHE_MODES, default=cache.get_mode(), help="LLM response cache mode")
+    parser.add_argument("--metrics", help="Write LLM call metrics in Prometheus text format to this path")
+    parser.add_argument("--profile", choices=OUTPUT_PROFILES, default="full", help="What each JSONL record keeps")
+    parser.add_argument("--mode", choices=PIPELINE_MODES, default=PIPELINE_MODE, help="llm or draft (heuristic, no LLM)")
+    parser.add_argument("--checkpoint", action="store_true", help="Checkpoint stages so interrupted BRDs resume mid-pipeline")
+    parser.add_argument("--deadline", type=float, help="Seconds each BRD's pipeline may take before stages fall back")
+    args = parser.parse_args(argv)
+    cache.set_mode(args.cache)
+
+    summary = run_sync(
+        run_batch(
+            args.inputs,
+            Path(args.output),
+            workers=args.workers,
+            resume=not args.no_resume,
+            profile=args.profile,
+            mode=args.mode,
+            checkpoint=args.checkpoint,
+            deadline_seconds=args.deadline,
+        )
+    )
+    print(f"Wrote results to {args.output}")
+    print(
+        f"processed={summary['processed']} failed={summary['failed']} "
+        f"agent_errors={summary['agent_errors']} skipped={summary['skipped']} coalesced={summary['coalesced']}"
+    )
+    print(
+        f"throughput={summary['brds_per_minute']} BRDs/min "
+        f"p50={summary['p50_seconds']}s p95={summary['p95_seconds']}s "
+        f"elapsed={summary['elapsed_seconds']}s"
+    )
+    if args.metrics:
+        Path(args.metrics).write_text(telemetry.prometheus_text(), encoding="utf-8")
 
 
 def main():
     env_path = Path(__file__).resolve().parents[1] / ".env"
     load_dotenv(dotenv_path=env_path)
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+        return
     parser = argparse.ArgumentParser(description="BRD-to-Engineering Generator (Python)")
-    parser.add_argument("--input", required=True, help="Path to BRD text/markdown file")
-    parser.add_argument("--output", default="output.json", help="Output JSON path")
+    parser.add_argument("--input", help="Path to BRD text/markdown file (optional with --run-id)")
+    parser.add_argument("--output", default="output.json", help="Output JSON path (gzip-compressed if it ends in .gz)")
+    parser.add_argument(
+        "--profile",
+        choices=OUTPUT_PROFILES,
+        default="full",
+        help="full (everything), compact (no _debug) or artifacts (generated artifacts only)",
+    )
+    parser.add_argument("--indent", type=int, default=2, help="JSON indent; 0 writes compact JSON")
+    parser.add_argument(
+        "--cache",
+        choices=cache.CACHE_MODES,
+        default=cache.get_mode(),
+        help="LLM response cache: use (default), refresh (ignore and overwrite entries) or bypass",
+    )
+    parser.add_argument(
+        "--previous",
+        help="Output JSON of an earlier revision; stages whose inputs did not change are reused",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=PIPELINE_MODES,
+        default=PIPELINE_MODE,
+        help="llm (default) or draft: heuristic artifacts in milliseconds without any LLM call",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Checkpoint every stage in the run store and resume the last unfinished run of this input",
+    )
+    parser.add_argument("--run-id", help="Checkpoint under this run ID, resuming it if it exists")
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Overall seconds for the pipeline; stages that run out of time fall back to drafts or cached results",
+    )
+    parser.add_argument("--metrics", help="Write LLM call metrics in Prometheus text format to this path")
     args = parser.parse_args()
+    cache.set_mode(args.cache)
+    if not args.input and not args.run_id:
+        parser.error("--input is required unless --run-id names a stored run")
 
-    text = Path(args.input).read_text(encoding="utf-8")
-    brd_sections = parse_brd_text(text)
-    artifacts = run_pipeline(brd_sections)
-    Path(args.output).write_text(json.dumps(artifacts, indent=2), encoding="utf-8")
-    print(f"Wrote output to {args.output}")
+    if args.checkpoint or args.run_id:
+        if args.input:
+            text = Path(args.input).read_text(encoding="utf-8")
+        else:
+            text = runstore.get_store().input_text(args.run_id)
+            if text is None:
+                parser.error(f"Unknown run ID {args.run_id}")
+        with open_text(args.output, "w") as handle:
+            writer = ArtifactWriter(handle, profile=args.profile, indent=args.indent)
+            artifacts = run_sync(
+                runstore.run_checkpointed_async(
+                    text,
+                    run_id=args.run_id,
+                    mode=args.mode if args.input else None,
+                    on_stage=writer.write,
+                    deadline_seconds=args.deadline,
+                )
+            )
+            writer.finish(artifacts)
+        report = artifacts["_debug"]["run_store"]
+        print(f"Run {report['run_id']}: resumed {', '.join(report['checkpointed_before']) or 'nothing'} from checkpoints")
+        mode = artifacts["_debug"]["mode"]
+        previous = None
+    else:
+        mode = resolve_mode(args.mode)
+        with open(args.input, encoding="utf-8") as handle:
+            brd_sections = parse_brd_stream(handle, use_llm=mode == "llm")
+        previous = read_json(args.previous) if args.previous else None
+        with open_text(args.output, "w") as handle:
+            # Artifacts are written as each stage finishes instead of serializing the whole result at the end.
+            writer = ArtifactWriter(handle, profile=args.profile, indent=args.indent)
+            writer.write("brd_sections", brd_sections)
+            artifacts = run_pipeline(
+                brd_sections, previous=previous, on_stage=writer.write, mode=mode, deadline_seconds=args.deadline
+            )
+            writer.finish(artifacts)
+    print(f"Wrote output to {args.output} ({Path(args.output).stat().st_size} bytes, profile={args.profile}, mode={mode})")
+    usage = artifacts["_debug"]["telemetry"]["total"]
+    print(
+        f"LLM calls={usage['calls']} (cache hits={usage['cache_hits']}) "
+        f"tokens={usage['prompt_tokens']}+{usage['completion_tokens']} cost=${usage['cost_usd']:.4f}"
+    )
+    if args.metrics:
+        Path(args.metrics).write_text(telemetry.prometheus_text(), encoding="utf-8")
+    if "deadline" in artifacts["_debug"]:
+        report = artifacts["_debug"]["deadline"]
+        print(f"Deadline {report['deadline_seconds']}s: timed out {', '.join(report['timed_out_stages']) or 'none'}")
+    if previous is not None:
+        report = artifacts["_debug"]["incremental"]
+        print(
+            f"Reused {len(report['reused_stages'])} stage(s), re-ran {', '.join(report['rerun_stages']) or 'none'}; "
+            f"saved ~{report['seconds_saved']}s"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+from openai import AsyncOpenAI
+
+from src.config import (
+    LLM_BACKEND,
+    LLM_CONNECT_TIMEOUT,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_POOL_MAX_CONNECTIONS,
+    LLM_POOL_MAX_KEEPALIVE,
+    LLM_READ_TIMEOUT,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+)
+
+
+# One AsyncOpenAI client (and therefore one HTTP connection pool) per event
+# loop. In practice that is one per process: sync callers share the
+# background loop in src/llm.py.
+_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+_stats = {"requests": 0, "opened": 0}
+_run_stats: ContextVar[dict | None] = ContextVar("connection_stats", default=None)
+_first_byte: ContextVar[dict | None] = ContextVar("first_byte", default=None)
+
+MOCK_BASE_URL = "http://mock-llm.invalid/v1"
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _check_api_key():
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set.")
+    if OPENAI_API_KEY in {"YOUR_KEY", "sk-your-key"} or not OPENAI_API_KEY.startswith("sk-"):
+        raise RuntimeError("OPENAI_API_KEY looks invalid. Update your .env with a real key.")
+
+
+def _count(field: str):
+    with _lock:
+        _stats[field] += 1
+    run_stats = _run_stats.get()
+    if run_stats is not None:
+        run_stats[field] += 1
+
+
+async def _trace(event_name: str, info: dict):
+    if event_name == "connection.connect_tcp.complete":
+        _count("opened")
+
+
+async def _on_request(request: httpx.Request):
+    _count("requests")
+    request.extensions["trace"] = _trace
+
+
+async def _on_response(response: httpx.Response):
+    # Response hooks fire once the headers are in, before the body is read.
+    timing = _first_byte.get()
+    if timing is not None:
+        timing.setdefault("at", time.perf_counter())
+
+
+@contextmanager
+def time_first_byte():
+    """Yield a dict that receives ``at`` (perf_counter) when the first response headers arrive."""
+    timing = {}
+    token = _first_byte.set(timing)
+    try:
+        yield timing
+    finally:
+        _first_byte.reset(token)
+
+
+def _http_client() -> httpx.AsyncClient:
+    event_hooks = {"request": [_on_request], "response": [_on_response]}
+    if LLM_BACKEND == "mock":
+        from src.mock_llm import MockLLMTransport
+
+        return httpx.AsyncClient(transport=MockLLMTransport(), event_hooks=event_hooks)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        event_hooks=event_hooks,
+    )
+
+
+def backend_url() -> str:
+    """Base URL completions come from; it scopes the response cache so backends never share entries."""
+    if LLM_BACKEND == "mock":
+        return MOCK_BASE_URL
+    return OPENAI_BASE_URL or DEFAULT_BASE_URL
+
+
+def get_async_client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is not None:
+        return client
+    with _lock:
+        client = _clients.get(loop)
+        if client is None:
+            if LLM_BACKEND == "mock":
+                options = {"api_key": OPENAI_API_KEY or "sk-mock", "base_url": MOCK_BASE_URL}
+            else:
+                _check_api_key()
+                options = {"api_key": OPENAI_API_KEY, "base_url": backend_url()}
+            # Retries are handled by src/llm.py so they go through the shared rate limiter.
+            client = AsyncOpenAI(http_client=_http_client(), max_retries=0, **options)
+            _clients[loop] = client
+    return client
+
+
+def _summarize(stats: dict) -> dict:
+    return {
+        "requests": stats["requests"],
+        "opened": stats["opened"],
+        "reused": max(stats["requests"] - stats["opened"], 0),
+    }
+
+
+def connection_stats() -> dict:
+    with _lock:
+        return _summarize(_stats)
+
+
+@contextmanager
+def track_connections():
+    """Collect connection counts for every LLM request issued in this context."""
+    stats = {"requests": 0, "opened": 0}
+    token = _run_stats.set(stats)
+    summary = {}
+    try:
+        yield summary
+    finally:
+        _run_stats.reset(token)
+        summary.update(_summarize(stats))
@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -9,4 +10,62 @@ load_dotenv(dotenv_path=env_path)
 
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
 SYSTEM_PROMPT = os.getenv("SYSTEM_PROMPT", "Return JSON only. No extra text.")
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "3"))
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "llm")
+PIPELINE_DEGRADED_FALLBACK = os.getenv("PIPELINE_DEGRADED_FALLBACK", "draft")
+PIPELINE_DEADLINE_SECONDS = float(os.getenv("PIPELINE_DEADLINE_SECONDS", "0"))
+PIPELINE_STAGE_WEIGHTS = json.loads(os.getenv("PIPELINE_STAGE_WEIGHTS", "{}"))
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "4"))
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "32"))
+SERVER_MAX_JOBS = int(os.getenv("SERVER_MAX_JOBS", "256"))
+SERVER_MAX_BODY_BYTES = int(os.getenv("SERVER_MAX_BODY_BYTES", str(5 * 1024 * 1024)))
+PARSER_CHUNK_CHARS = int(os.getenv("PARSER_CHUNK_CHARS", "12000"))
+PARSER_CHUNK_CONCURRENCY = int(os.getenv("PARSER_CHUNK_CONCURRENCY", "8"))
+PARSER_HYBRID_MIN_CHARS = int(os.getenv("PARSER_HYBRID_MIN_CHARS", "32"))
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "20"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "10"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "use")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    str(Path(__file__).resolve().parents[1] / ".cache" / "llm_responses.sqlite"),
+)
+RUN_STORE_PATH = os.getenv(
+    "RUN_STORE_PATH",
+    str(Path(__file__).resolve().parents[1] / ".cache" / "runs.sqlite"),
+)
+RUN_STORE_MAX_RUNS = int(os.getenv("RUN_STORE_MAX_RUNS", "1000"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "200000"))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", "1000"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "4"))
+LLM_LATENCY_TARGET_SECONDS = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_RESPONSE_FORMAT = os.getenv("LLM_RESPONSE_FORMAT", "json_schema")
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_PERCENTILES = json.loads(os.getenv("LLM_HEDGE_PERCENTILES", "{}"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.1"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+LLM_INPUT_TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", "6000"))
+LLM_INPUT_TOKEN_BUDGETS = json.loads(os.getenv("LLM_INPUT_TOKEN_BUDGETS", "{}"))
+LLM_PRICING = json.loads(os.getenv("LLM_PRICING", "{}"))
+LLM_TELEMETRY_LOG = os.getenv("LLM_TELEMETRY_LOG", "")
+MOCK_LLM_LATENCY = os.getenv("MOCK_LLM_LATENCY", "lognormal:50:0.5")
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+MOCK_LLM_SEED = int(os.getenv("MOCK_LLM_SEED")) if os.getenv("MOCK_LLM_SEED") else None
@@ -0,0 +1,284 @@
+import math
+import re
+
+
+# Deterministic, offline artifact generation. Each function takes the same
+# (projected) input as the matching agent in src/agents.py and returns a
+# schema-valid artifact built from the BRD text with simple heuristics, so a
+# draft is available in milliseconds without an LLM and can stand in for an
+# agent that failed. Inputs may be malformed LLM output, so every field is
+# type-checked and coerced rather than trusted.
+
+REQUIREMENTS_PER_PHASE = 3
+REQUIREMENTS_PER_ENGINEER = 4
+WEEKS_PER_REQUIREMENT = 1.5
+
+_STOPWORDS = {
+    "a", "an", "and", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "the", "to", "with", "should", "must", "shall", "will", "can",
+    "provide", "support", "allow", "enable", "users", "user", "system",
+}
+_FRONTEND_WORDS = {"ui", "dashboard", "portal", "screen", "page", "view", "views", "web", "mobile", "app"}
+_DATA_WORDS = {"ingest", "import", "etl", "pipeline", "analytics", "report", "reports", "trend", "classify", "ml", "model"}
+_CLOUDS = (("aws", "AWS (ECS/Lambda)"), ("azure", "Azure (App Service/Functions)"), ("gcp", "GCP (Cloud Run)"), ("google cloud", "GCP (Cloud Run)"))
+
+
+def _list(value) -> list:
+    return value if isinstance(value, list) else []
+
+
+def _text(value) -> str:
+    return str(value or "")
+
+
+def _texts(value) -> list:
+    return [_text(item) for item in _list(value) if item]
+
+
+def _dicts(value) -> list:
+    return [item for item in _list(value) if isinstance(item, dict)]
+
+
+def _sections(brd_sections: dict) -> dict:
+    sections = brd_sections.get("sections") if isinstance(brd_sections, dict) else None
+    if not isinstance(sections, dict):
+        return {}
+    coerced = {key: _text(value) if key == "problem" else _texts(value) for key, value in sections.items()}
+    return {key: value for key, value in coerced.items() if value}
+
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _title(text: str, limit: int = 4) -> str:
+    words = [word for word in _words(text) if word not in _STOPWORDS][:limit]
+    return " ".join(word.capitalize() for word in words) or "Core"
+
+
+def _mentions(items: list, vocabulary: set) -> bool:
+    return any(word in vocabulary for item in items for word in _words(item))
+
+
+def _groups(items: list, size: int) -> list:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def _overview(sections: dict) -> str:
+    problem = sections.get("problem", "")
+    objectives = sections.get("objectives", [])
+    if problem and objectives:
+        return f"{problem} Goal: {objectives[0]}."
+    return problem or (objectives[0] if objectives else "Deliver the requirements described in the BRD.")
+
+
+def draft_engineering_plan(brd_sections: dict) -> dict:
+    sections = _sections(brd_sections)
+    objectives = sections.get("objectives", [])
+    functional = sections.get("functional_requirements", [])
+    non_functional = sections.get("non_functional_requirements", [])
+    dependencies = sections.get("dependencies", [])
+
+    phases = [
+        {
+            "name": "Discovery & Design",
+            "objectives": objectives[:3] or ["Confirm scope and success metrics"],
+            "key_deliverables": ["Solution architecture", "Delivery plan", "Refined backlog"],
+            "dependencies": dependencies[:3],
+            "acceptance_criteria": ["Architecture and backlog signed off by stakeholders"],
+        }
+    ]
+    for group in _groups(functional, REQUIREMENTS_PER_PHASE):
+        phases.append(
+            {
+                "name": f"Build: {_title(group[0])}",
+                "objectives": group,
+                "key_deliverables": [f"{_title(item)} implemented and tested" for item in group],
+                "dependencies": [phases[-1]["name"]],
+                "acceptance_criteria": [f"Demonstrated: {item}" for item in group],
+            }
+        )
+    phases.append(
+        {
+            "name": "Hardening & Launch",
+            "objectives": non_functional[:3] or ["Production readiness"],
+            "key_deliverables": ["Performance and security testing", "Runbooks and monitoring", "Production release"],
+            "dependencies": [phases[-1]["name"]],
+            "acceptance_criteria": [f"Verified: {item}" for item in non_functional[:3]] or ["Release checklist complete"],
+        }
+    )
+
+    engineers = max(1, math.ceil(len(functional) / REQUIREMENTS_PER_ENGINEER))
+    team = [
+        {"role": "Product Manager", "count": 1, "notes": "Owns scope and acceptance"},
+        {"role": "Backend Engineer", "count": engineers, "notes": f"{len(functional)} functional requirements"},
+    ]
+    if _mentions(functional + objectives, _FRONTEND_WORDS):
+        team.append({"role": "Frontend Engineer", "count": 1, "notes": "User-facing views"})
+    if _mentions(functional, _DATA_WORDS):
+        team.append({"role": "Data Engineer", "count": 1, "notes": "Ingestion and analytics"})
+    if non_functional:
+        team.append({"role": "DevOps Engineer", "count": 1, "notes": "Non-functional requirements and release"})
+    team.append({"role": "QA Engineer", "count": 1, "notes": "Test plan and acceptance testing"})
+
+    risks = [
+        {"risk": f"Dependency on {item}", "impact": "Medium", "mitigation": "Confirm access and ownership during discovery"}
+        for item in dependencies
+    ] + [
+        {"risk": f"Constraint: {item}", "impact": "High", "mitigation": "Validate the design against it before build"}
+        for item in sections.get("constraints", [])
+    ]
+    if not risks:
+        risks = [{"risk": "Scope is not fully specified", "impact": "Medium", "mitigation": "Time-box discovery"}]
+
+    return {
+        "project_overview": _overview(sections),
+        "phases": phases,
+        "team_composition": team,
+        "risks": risks,
+        "assumptions": sections.get("assumptions", []) or ["Draft generated from the BRD without an LLM"],
+    }
+
+
+def _phase_weeks(phase: dict) -> float:
+    if _text(phase.get("name")).startswith("Build"):
+        return max(1.0, round(len(_list(phase.get("objectives"))) * WEEKS_PER_REQUIREMENT))
+    return 2.0
+
+
+def _count(value) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) and value > 0 else 1
+
+
+def draft_schedule(plan: dict) -> dict:
+    plan = plan if isinstance(plan, dict) else {}
+    phases = [
+        {
+            "name": _text(phase.get("name")) or f"Phase {index + 1}",
+            "duration_weeks": _phase_weeks(phase),
+            "key_activities": _texts(phase.get("key_deliverables")) or _texts(phase.get("objectives")),
+        }
+        for index, phase in enumerate(_dicts(plan.get("phases")))
+    ]
+    resources = [
+        {
+            "role": _text(member.get("role")),
+            "count": _count(member.get("count")),
+            "allocation_percent": 100 if "Engineer" in _text(member.get("role")) else 50,
+        }
+        for member in _dicts(plan.get("team_composition"))
+    ]
+    return {
+        "timeline_weeks": sum(phase["duration_weeks"] for phase in phases),
+        "phases": phases,
+        "resource_matrix": resources,
+        "assumptions": _texts(plan.get("assumptions")),
+        "notes": [
+            f"Draft estimate: {WEEKS_PER_REQUIREMENT} weeks per functional requirement, 2 weeks for discovery and hardening",
+            "Phases are sequential; no parallel build streams assumed",
+        ],
+    }
+
+
+def draft_architecture(brd_sections: dict) -> dict:
+    sections = _sections(brd_sections)
+    functional = sections.get("functional_requirements", [])
+    services = [
+        {
+            "name": f"{_title(group[0], 2)} Service",
+            "responsibility": "; ".join(group),
+            "interfaces": ["REST API", "Database"],
+        }
+        for group in _groups(functional, REQUIREMENTS_PER_PHASE)
+    ] or [{"name": "Core Service", "responsibility": "Business logic", "interfaces": ["REST API", "Database"]}]
+    integrations = [
+        {"name": f"{_title(item, 3)} Adapter", "responsibility": f"Integration with {item}", "interfaces": ["External API"]}
+        for item in sections.get("dependencies", [])
+    ]
+    components = (
+        [{"name": "API Gateway", "responsibility": "Authentication, routing and rate limiting", "interfaces": ["HTTPS"]}]
+        + services
+        + integrations
+        + [{"name": "Data Store", "responsibility": "Persistent storage", "interfaces": ["SQL"]}]
+    )
+    flows = [{"from": "Client", "to": "API Gateway", "description": "User requests"}]
+    for service in services:
+        flows.append({"from": "API Gateway", "to": service["name"], "description": "Routed API calls"})
+        flows.append({"from": service["name"], "to": "Data Store", "description": "Reads and writes domain data"})
+    for adapter in integrations:
+        flows.append({"from": services[0]["name"], "to": adapter["name"], "description": adapter["responsibility"]})
+    return {
+        "summary": f"Service-based architecture behind an API gateway. {_overview(sections)}",
+        "components": components,
+        "data_flows": flows,
+        "non_functional_considerations": sections.get("non_functional_requirements", [])
+        + [f"Constraint: {item}" for item in sections.get("constraints", [])],
+        "open_questions": [f"Confirm dependency: {item}" for item in sections.get("dependencies", [])]
+        or ["Which existing systems must be integrated?"],
+    }
+
+
+def draft_poc(architecture: dict) -> dict:
+    architecture = architecture if isinstance(architecture, dict) else {}
+    names = [_text(component.get("name")) for component in _dicts(architecture.get("components"))]
+    names = [name for name in names if name]
+    services = [name for name in names if name.endswith("Service")]
+    in_scope = (services[:1] or names[:1]) + [name for name in names if name in {"API Gateway", "Data Store"}]
+    return {
+        "poc_goal": f"Prove the core flow end to end: {_text(architecture.get('summary'))}".strip(),
+        "in_scope_components": in_scope,
+        "out_of_scope": [name for name in names if name not in in_scope],
+        "success_criteria": [f"{name} handles a representative request" for name in in_scope]
+        + ["End-to-end latency measured against the non-functional targets"],
+        "timeline_weeks": 2 + min(len(in_scope), 2),
+        "risks": _texts(architecture.get("open_questions"))[:5],
+    }
+
+
+def _cloud(items: list) -> str:
+    text = " ".join(items).lower()
+    for word, infra in _CLOUDS:
+        if word in text:
+            return infra
+    return "Containers on a managed Kubernetes service"
+
+
+def draft_tech_stack(brd_sections: dict) -> dict:
+    sections = _sections(brd_sections)
+    functional = sections.get("functional_requirements", [])
+    infra = _cloud(sections.get("constraints", []) + sections.get("dependencies", []) + sections.get("non_functional_requirements", []))
+    data_heavy = _mentions(functional, _DATA_WORDS)
+    options = [
+        {
+            "name": "Python services",
+            "stack": {
+                "frontend": "React",
+                "backend": "Python (FastAPI)",
+                "database": "PostgreSQL",
+                "infra": infra,
+                "observability": "OpenTelemetry + Prometheus/Grafana",
+            },
+            "pros": ["Strong data and ML ecosystem", "Fast to prototype"],
+            "cons": ["Lower raw throughput than compiled runtimes"],
+            "fit_notes": "Suits data processing and analytics requirements" if data_heavy else "General-purpose default",
+        },
+        {
+            "name": "TypeScript services",
+            "stack": {
+                "frontend": "React",
+                "backend": "Node.js (NestJS)",
+                "database": "PostgreSQL",
+                "infra": infra,
+                "observability": "OpenTelemetry + Prometheus/Grafana",
+            },
+            "pros": ["One language across frontend and backend", "Large hiring pool"],
+            "cons": ["Weaker fit for heavy data processing"],
+            "fit_notes": "Suits API- and UI-centric products",
+        },
+    ]
+    recommended = options[0] if data_heavy or not _mentions(functional, _FRONTEND_WORDS) else options[1]
+    return {
+        "options": options,
+        "recommendation": f"{recommended['name']}: {recommended['fit_notes'].lower()} (draft heuristic, review before committing)",
+    }
+
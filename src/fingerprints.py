@@ -0,0 +1,17 @@
+import hashlib
+import json
+
+
+def fingerprint(value) -> str:
+    material = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def section_fingerprints(brd_sections: dict) -> dict:
+    sections = brd_sections.get("sections", {}) if isinstance(brd_sections, dict) else {}
+    return {key: fingerprint(value) for key, value in sections.items()}
+
+
+def changed_sections(previous: dict, current: dict) -> list:
+    keys = list(current) + [key for key in previous if key not in current]
+    return [key for key in keys if previous.get(key) != current.get(key)]
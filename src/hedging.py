@@ -0,0 +1,96 @@
+import math
+import threading
+from collections import deque
+
+from src.config import (
+    LLM_HEDGE_MAX_RATE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_PERCENTILES,
+    LLM_HEDGE_WINDOW,
+)
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+class HedgePolicy:
+    """When to send a duplicate (hedge) request for a slow LLM call.
+
+    Each stage keeps a window of recent completion latencies; a call that is
+    still running after that stage's latency percentile gets one hedge, as
+    long as hedges stay under ``max_rate`` of the recent calls.
+    """
+
+    def __init__(
+        self,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        percentiles: dict | None = None,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        max_rate: float = LLM_HEDGE_MAX_RATE,
+        window: int = LLM_HEDGE_WINDOW,
+    ):
+        self.percentile = percentile
+        self.percentiles = LLM_HEDGE_PERCENTILES if percentiles is None else percentiles
+        self.min_samples = max(min_samples, 1)
+        self.max_rate = max_rate
+        self.window = max(window, 1)
+        self._latencies = {}
+        self._calls = deque(maxlen=self.window)
+        self._hedges_in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "capped": 0}
+
+    def record_latency(self, stage: str, seconds: float):
+        with self._lock:
+            samples = self._latencies.setdefault(stage, deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def delay(self, stage: str) -> float | None:
+        """Seconds to wait before hedging a call for ``stage``; ``None`` until enough history."""
+        with self._lock:
+            samples = sorted(self._latencies.get(stage, ()))
+        if len(samples) < self.min_samples:
+            return None
+        pct = self.percentiles.get(stage, self.percentile)
+        return samples[min(len(samples) - 1, max(math.ceil(pct / 100 * len(samples)) - 1, 0))]
+
+    def try_hedge(self) -> bool:
+        with self._lock:
+            hedges = sum(self._calls) + self._hedges_in_flight
+            if hedges + 1 > self.max_rate * (len(self._calls) + 1):
+                self._stats["capped"] += 1
+                return False
+            self._hedges_in_flight += 1
+            return True
+
+    def release(self):
+        """Give back a hedge granted by ``try_hedge`` that was not sent after all."""
+        with self._lock:
+            self._hedges_in_flight -= 1
+
+    def finish(self, hedged: bool, hedge_won: bool = False):
+        with self._lock:
+            self._calls.append(hedged)
+            self._stats["calls"] += 1
+            if hedged:
+                self._hedges_in_flight -= 1
+                self._stats["hedged"] += 1
+                self._stats["hedge_wins"] += int(hedge_won)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            recent = len(self._calls)
+            stats["recent_hedge_rate"] = round(sum(self._calls) / recent, 3) if recent else 0.0
+        stats["delays"] = {stage: self.delay(stage) for stage in list(self._latencies)}
+        return stats
+
+
+def get_hedge_policy() -> HedgePolicy:
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy()
+    return _policy
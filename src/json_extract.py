@@ -0,0 +1,73 @@
+import json
+
+
+# Candidate "{" positions tried before giving up. Each attempt is one linear
+# raw_decode scan and a failed one is skipped as a whole, so extraction stays
+# O(n) for any completion.
+MAX_CANDIDATES = 8
+
+_decoder = json.JSONDecoder()
+
+
+def _span_end(text: str, start: int) -> int:
+    """Offset just past the brace that closes ``text[start]``, or ``len(text)`` if it never closes."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return len(text)
+
+
+def extract_json(text: str) -> dict:
+    """Return the JSON object in a completion.
+
+    Handles bare JSON, code fences (```json ... ```) and prose before or after
+    the object without regex backtracking. Only top-level objects count; when
+    the outer object is invalid or truncated this raises instead of returning
+    something nested inside it.
+    """
+    stripped = text.strip()
+    if stripped.startswith("{"):
+        try:
+            value, _ = _decoder.raw_decode(stripped)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+
+    start = text.find("```")
+    position = text.find("{", start if start != -1 else 0)
+    if position == -1 and start != -1:
+        position = text.find("{")
+    error = None
+    for _ in range(MAX_CANDIDATES):
+        if position == -1:
+            break
+        try:
+            value, _ = _decoder.raw_decode(text, position)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError as exc:
+            error = exc
+        # Never fall back to an object nested in the broken one: a truncated
+        # artifact must fail rather than return one of its elements.
+        position = text.find("{", _span_end(text, position))
+    if error is not None:
+        raise error
+    raise json.JSONDecodeError("No JSON object found", text, 0)
@@ -0,0 +1,364 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src import cache, singleflight, telemetry
+from src.clients import backend_url, get_async_client, time_first_byte
+from src.config import (
+    LLM_EXPECTED_COMPLETION_TOKENS,
+    LLM_HEDGE,
+    LLM_MAX_RETRIES,
+    LLM_RESPONSE_FORMAT,
+    OPENAI_MODEL,
+    SYSTEM_PROMPT,
+)
+from src.hedging import get_hedge_policy
+from src.ratelimit import RETRYABLE_ERRORS, backoff_delay, estimate_tokens, get_limiter, retry_after_seconds
+from src.streaming import IncrementalJSONObject
+
+
+_loop = None
+_loop_lock = threading.Lock()
+_calls: ContextVar[list | None] = ContextVar("llm_calls", default=None)
+_deadline: ContextVar[float | None] = ContextVar("llm_deadline", default=None)
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="brd-event-loop", daemon=True)
+            thread.start()
+    return _loop
+
+
+def submit(coro):
+    """Schedule a coroutine on the shared background loop and return its future."""
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("Cannot block on the pipeline event loop; await the coroutine instead.")
+    return asyncio.run_coroutine_threadsafe(coro, loop)
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    All sync entry points share one background event loop, so callers that
+    already run inside their own loop (Streamlit, notebooks) are supported too.
+    """
+    return submit(coro).result()
+
+
+@contextmanager
+def track_calls():
+    """Collect a record for every LLM completion requested in this context."""
+    calls = []
+    token = _calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _calls.reset(token)
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """Bound every LLM call in this context to finish within ``seconds`` from now.
+
+    Nested deadlines keep the earlier one. Calls get the remaining time as
+    their request timeout; once it is spent only cached responses are served.
+    """
+    current = _deadline.get()
+    if seconds is not None:
+        at = time.monotonic() + seconds
+        current = at if current is None else min(current, at)
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> float | None:
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def _record_call(record: dict):
+    calls = _calls.get()
+    if calls is not None:
+        calls.append(record)
+
+
+def cache_status(calls: list) -> str:
+    if not calls:
+        return "none"
+    if all(call["cache"] == "hit" for call in calls):
+        return "hit"
+    return "coalesced" if all(call["cache"] in {"hit", "coalesced"} for call in calls) else "miss"
+
+
+def _usage_fields(usage) -> dict:
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+    }
+
+
+def response_format(schema: dict | None, name: str) -> dict | None:
+    """Build the ``response_format`` request option for LLM_RESPONSE_FORMAT.
+
+    ``json_schema`` constrains decoding to ``schema`` (non-strict, since the
+    repo schemas allow extra keys); ``json_object`` only guarantees valid
+    JSON; ``text`` sends nothing.
+    """
+    if LLM_RESPONSE_FORMAT == "json_schema" and schema is not None:
+        return {"type": "json_schema", "json_schema": {"name": name, "schema": schema, "strict": False}}
+    if LLM_RESPONSE_FORMAT in {"json_schema", "json_object"}:
+        return {"type": "json_object"}
+    return None
+
+
+async def _create(prompt: str, temperature: float, on_partial=None, format_option: dict | None = None) -> tuple[str, dict]:
+    """Return the completion text and call metadata (model, token usage, ttfb_seconds)."""
+    client = get_async_client()
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+    options = {"response_format": format_option} if format_option is not None else {}
+    remaining = remaining_seconds()
+    if remaining is not None:
+        options["timeout"] = max(remaining, 0.001)
+    started = time.perf_counter()
+    if on_partial is None:
+        with time_first_byte() as first_byte:
+            response = await client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=temperature,
+                **options,
+            )
+        meta = {"model": response.model or OPENAI_MODEL, **_usage_fields(response.usage)}
+        meta["ttfb_seconds"] = round(first_byte.get("at", time.perf_counter()) - started, 3)
+        return response.choices[0].message.content or "{}", meta
+
+    assembler = IncrementalJSONObject()
+    meta = {"model": OPENAI_MODEL}
+    stream = await client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True},
+        **options,
+    )
+    async for chunk in stream:
+        if chunk.model:
+            meta["model"] = chunk.model
+        if chunk.usage:
+            meta.update(_usage_fields(chunk.usage))
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            # For streams the first token, not the headers, is what a reader waits for.
+            meta.setdefault("ttfb_seconds", round(time.perf_counter() - started, 3))
+            for key, value in assembler.feed(delta):
+                on_partial(key, value)
+    return assembler.buffer or "{}", meta
+
+
+async def _create_hedged(
+    prompt: str,
+    temperature: float,
+    record: dict,
+    format_option: dict | None = None,
+) -> tuple[str, dict]:
+    """``_create`` with one duplicate request if it outlives the stage's latency percentile.
+
+    Whichever request succeeds first wins and the other is cancelled. The hedge
+    takes its own request and tokens from the rate limiter's buckets, and its
+    prompt tokens are recorded as ``hedge_prompt_tokens`` (the loser's partial
+    completion is not known).
+    """
+    policy = get_hedge_policy()
+    limiter = get_limiter()
+    stage = record["stage"]
+    prompt_tokens = estimate_tokens(SYSTEM_PROMPT + prompt)
+    started = {}
+
+    def launch() -> asyncio.Task:
+        task = asyncio.create_task(_create(prompt, temperature, None, format_option))
+        started[task] = time.perf_counter()
+        return task
+
+    primary = launch()
+    hedge = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=policy.delay(stage))
+        if not done:
+            if not policy.try_hedge():
+                record["hedge_capped"] = True
+            elif not limiter.try_reserve(prompt_tokens + LLM_EXPECTED_COMPLETION_TOKENS):
+                policy.release()
+                record["hedge_rate_limited"] = True
+            else:
+                hedge = launch()
+                record["hedged"] = True
+                record["hedge_prompt_tokens"] = record.get("hedge_prompt_tokens", 0) + prompt_tokens
+        pending = set(started)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    policy.record_latency(stage, time.perf_counter() - started[task])
+                    if hedge is not None:
+                        record["hedge_won"] = task is hedge
+                    return task.result()
+        raise primary.exception()
+    finally:
+        for task in started:
+            if not task.done():
+                task.cancel()
+        policy.finish(hedge is not None, record.get("hedge_won", False))
+
+
+async def _create_with_retries(
+    prompt: str,
+    temperature: float,
+    on_partial,
+    record: dict,
+    format_option: dict | None = None,
+) -> str:
+    """Issue the completion through the shared rate limiter, retrying transient failures."""
+    limiter = get_limiter()
+    estimated = estimate_tokens(SYSTEM_PROMPT + prompt) + LLM_EXPECTED_COMPLETION_TOKENS
+    attempt = 0
+    while True:
+        async with limiter.slot(estimated):
+            started = time.perf_counter()
+            try:
+                if LLM_HEDGE and on_partial is None:
+                    content, meta = await _create_hedged(prompt, temperature, record, format_option)
+                else:
+                    content, meta = await _create(prompt, temperature, on_partial, format_option)
+            except RETRYABLE_ERRORS as exc:
+                limiter.on_error(exc)
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, retry_after_seconds(exc))
+            else:
+                used = meta.get("prompt_tokens", 0) + meta.get("completion_tokens", 0)
+                limiter.on_success(time.perf_counter() - started, used - estimated if used else 0)
+                record.update(meta)
+                return content
+        attempt += 1
+        record["retries"] = attempt
+        await asyncio.sleep(delay)
+
+
+def _replay(result, on_partial):
+    if on_partial is not None and isinstance(result, dict):
+        for key, value in result.items():
+            on_partial(key, value)
+
+
+def _finish(record: dict, start: float):
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    if "prompt_tokens" in record:
+        # A hedge's duplicate prompt is billed too, whichever request won.
+        cost = telemetry.estimate_cost(
+            record["model"],
+            record["prompt_tokens"] + record.get("hedge_prompt_tokens", 0),
+            record["completion_tokens"],
+            record["cached_tokens"],
+        )
+        record["cost_usd"] = round(cost, 8) if cost is not None else None
+    telemetry.observe(record)
+
+
+async def complete_async(
+    prompt: str,
+    temperature: float,
+    parse,
+    on_partial=None,
+    schema: dict | None = None,
+    schema_name: str = "response",
+):
+    """Return ``parse(content)`` for the completion of ``prompt``.
+
+    Completions are served from the response cache when possible; only
+    content that ``parse`` accepts is written back. When ``on_partial`` is
+    given the completion is streamed and ``on_partial(key, value)`` fires as
+    each top-level member of the JSON object closes. ``schema`` asks the
+    model for output constrained to that JSON Schema. Concurrent calls with
+    the same cache key share one in-flight request (see src/singleflight.py).
+    Inside ``deadline()`` a call that cannot finish in time raises
+    ``TimeoutError``; cache hits are returned regardless.
+    """
+    start = time.perf_counter()
+    mode = cache.get_mode()
+    format_option = response_format(schema, schema_name)
+    key = cache.cache_key(OPENAI_MODEL, SYSTEM_PROMPT, temperature, prompt, format_option, backend_url())
+    record = {
+        "stage": telemetry.current_stage(),
+        "model": OPENAI_MODEL,
+        "cache": "miss" if mode == "use" else mode,
+        "status": "ok",
+        "retries": 0,
+    }
+    _record_call(record)
+    if mode == "use":
+        content = cache.get_cache().get(key)
+        if content is not None:
+            try:
+                result = parse(content)
+            except ValueError:
+                pass
+            else:
+                record["cache"] = "hit"
+                _finish(record, start)
+                _replay(result, on_partial)
+                return result
+    shared = False
+    try:
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError("Deadline exceeded before the LLM call started")
+        try:
+            async with asyncio.timeout(remaining):
+                content, shared = await singleflight.prompts.do(
+                    key, lambda: _create_with_retries(prompt, temperature, on_partial, record, format_option)
+                )
+        except TimeoutError:
+            if remaining is None:
+                raise
+            raise TimeoutError(f"Deadline exceeded after {remaining:.1f}s waiting for the LLM") from None
+        if shared:
+            record["cache"] = "coalesced"
+        result = parse(content)
+    except BaseException as exc:
+        # A call cancelled by a stage deadline that has passed ran out of time too.
+        remaining = remaining_seconds()
+        expired = remaining is not None and remaining <= 0
+        record["status"] = "timeout" if isinstance(exc, TimeoutError) or expired else "error"
+        record["error"] = type(exc).__name__
+        raise
+    finally:
+        _finish(record, start)
+    if shared:
+        _replay(result, on_partial)
+    elif mode != "bypass":
+        cache.get_cache().put(key, content)
+    return result
+
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from src.config import MOCK_LLM_ERROR_RATE, MOCK_LLM_LATENCY, MOCK_LLM_SEED
+from src.ratelimit import estimate_tokens
+
+
+# Offline stand-in for the OpenAI chat completions endpoint. Selected with
+# LLM_BACKEND=mock; used by evals/bench_suite.py and for running the pipeline
+# without network access. Responses are canned per agent and validate
+# against the schemas in schemas/.
+
+CANNED_RESPONSES = {
+    "brd_parser": {
+        "schema": "brd_sections_v1",
+        "sections": {
+            "problem": "Manual order reconciliation delays month-end close.",
+            "objectives": ["Automate reconciliation", "Cut close time to two days"],
+            "functional_requirements": ["Import bank statements", "Match orders to payments"],
+            "non_functional_requirements": ["p95 latency under 2 seconds"],
+            "constraints": ["Must run on the existing cloud account"],
+            "dependencies": ["Payments API"],
+            "assumptions": ["Finance team reviews exceptions daily"],
+        },
+    },
+    "engineering_plan": {
+        "project_overview": "Automated reconciliation service for finance operations.",
+        "phases": [
+            {
+                "name": "Foundation",
+                "objectives": ["Ingest bank statements"],
+                "key_deliverables": ["Statement importer"],
+                "dependencies": ["Payments API access"],
+                "acceptance_criteria": ["Statements import without manual steps"],
+            },
+            {
+                "name": "Matching",
+                "objectives": ["Match orders to payments"],
+                "key_deliverables": ["Matching engine", "Exception queue"],
+                "dependencies": ["Foundation"],
+                "acceptance_criteria": ["95% of orders matched automatically"],
+            },
+        ],
+        "team_composition": [
+            {"role": "Backend Engineer", "count": 2, "notes": "Importer and matching"},
+            {"role": "QA Engineer", "count": 1, "notes": "Reconciliation test data"},
+        ],
+        "risks": [
+            {"risk": "Inconsistent bank formats", "impact": "High", "mitigation": "Pluggable parsers"},
+        ],
+        "assumptions": ["Payments API is stable"],
+    },
+    "schedule_estimate": {
+        "timeline_weeks": 10,
+        "phases": [
+            {"name": "Foundation", "duration_weeks": 4, "key_activities": ["Importer", "Storage"]},
+            {"name": "Matching", "duration_weeks": 6, "key_activities": ["Matching rules", "Exception UI"]},
+        ],
+        "resource_matrix": [
+            {"role": "Backend Engineer", "count": 2, "allocation_percent": 100},
+            {"role": "QA Engineer", "count": 1, "allocation_percent": 50},
+        ],
+        "assumptions": ["Team starts together"],
+        "notes": ["Buffer included in Matching"],
+    },
+    "solution_architecture": {
+        "summary": "Event-driven importer feeding a matching service with an exception queue.",
+        "components": [
+            {"name": "Importer", "responsibility": "Normalize bank statements", "interfaces": ["SFTP", "REST"]},
+            {"name": "Matcher", "responsibility": "Match payments to orders", "interfaces": ["Queue"]},
+        ],
+        "data_flows": [
+            {"from": "Importer", "to": "Matcher", "description": "Normalized statement lines"},
+        ],
+        "non_functional_considerations": ["Idempotent imports"],
+        "open_questions": ["Retention period for raw statements"],
+    },
+    "poc_plan": {
+        "poc_goal": "Prove automatic matching on one month of data.",
+        "in_scope_components": ["Importer", "Matcher"],
+        "out_of_scope": ["Exception UI"],
+        "success_criteria": ["90% match rate on sample month"],
+        "timeline_weeks": 3,
+        "risks": ["Sample data quality"],
+    },
+    "tech_stack_recommendations": {
+        "options": [
+            {
+                "name": "Managed Python",
+                "stack": {
+                    "frontend": "React",
+                    "backend": "FastAPI",
+                    "database": "PostgreSQL",
+                    "infra": "Managed containers",
+                    "observability": "OpenTelemetry",
+                },
+                "pros": ["Team familiarity"],
+                "cons": ["Container ops overhead"],
+                "fit_notes": "Good fit for a small team.",
+            },
+        ],
+        "recommendation": "Managed Python",
+    },
+}
+
+# First line of each prompt template, used to tell agents apart.
+PROMPT_MARKERS = {
+    "You are a BRD parser.": "brd_parser",
+    "You are the Engineering Plan Generator.": "engineering_plan",
+    "You are the Schedule Estimator.": "schedule_estimate",
+    "You are the Solution Architect.": "solution_architecture",
+    "You are the PoC Planner.": "poc_plan",
+    "You are the Tech Stack Recommender.": "tech_stack_recommendations",
+}
+
+
+def parse_latency(spec: str):
+    """Return a sampler for ``fixed:MS``, ``uniform:LO:HI`` or ``lognormal:MEDIAN:SIGMA`` (milliseconds)."""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(":") if value]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma) / 1000
+    raise ValueError(f"Unsupported MOCK_LLM_LATENCY: {spec!r}")
+
+
+def agent_for_prompt(prompt: str) -> str | None:
+    first_line = prompt.lstrip().split("\n", 1)[0].strip()
+    return PROMPT_MARKERS.get(first_line)
+
+
+class MockLLMTransport(httpx.AsyncBaseTransport):
+    def __init__(self, latency: str = MOCK_LLM_LATENCY, error_rate: float = MOCK_LLM_ERROR_RATE,
+                 seed: int | None = MOCK_LLM_SEED, responses: dict | None = None):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.responses = responses or CANNED_RESPONSES
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        body = json.loads(await request.aread())
+        prompt = body["messages"][-1]["content"]
+        latency = self.sample_latency(self.rng)
+
+        if self.rng.random() < self.error_rate:
+            await asyncio.sleep(latency)
+            status = self.rng.choice([429, 500])
+            return httpx.Response(
+                status,
+                headers={"retry-after-ms": "10"},
+                json={"error": {"message": "mock failure", "type": "mock_error"}},
+            )
+
+        content = json.dumps(self.responses.get(agent_for_prompt(prompt), {}))
+        usage = {
+            "prompt_tokens": estimate_tokens(" ".join(m["content"] for m in body["messages"])),
+            "completion_tokens": estimate_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"mock-{self.requests}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return httpx.Response(200, json={
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": usage,
+            })
+
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=self._stream(completion_id, body["model"], content, usage, latency),
+        )
+
+    async def _stream(self, completion_id, model, content, usage, latency):
+        # Half the latency before the first token, the rest spread over the chunks.
+        pieces = [content[i:i + 64] for i in range(0, len(content), 64)] or [""]
+        await asyncio.sleep(latency / 2)
+        for piece in pieces:
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+            await asyncio.sleep(latency / 2 / len(pieces))
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": usage,
+        }
+        yield f"data: {json.dumps(final)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
@@ -1,65 +1,427 @@
+import asyncio
+import copy
+import json
+import queue
 import time
 
 from src.agents import (
-    eng_plan_generator,
-    schedule_estimator,
-    solution_architect,
-    poc_planner,
-    tech_stack_recommender,
+    degraded_fallback,
+    eng_plan_generator_async,
+    schedule_estimator_async,
+    solution_architect_async,
+    poc_planner_async,
+    tech_stack_recommender_async,
 )
+from src import draft, telemetry
+from src.clients import track_connections
+from src.fallback import (
+    architecture_fallback,
+    eng_plan_fallback,
+    poc_fallback,
+    schedule_fallback,
+    tech_stack_fallback,
+)
+from src.config import (
+    LLM_HEDGE,
+    LLM_INPUT_TOKEN_BUDGET,
+    LLM_INPUT_TOKEN_BUDGETS,
+    OPENAI_MODEL,
+    PIPELINE_DEADLINE_SECONDS,
+    PIPELINE_MAX_WORKERS,
+    PIPELINE_MODE,
+    PIPELINE_STAGE_WEIGHTS,
+)
+from src.fingerprints import changed_sections, fingerprint, section_fingerprints
 from src.guardrails import apply_guardrails
+from src.hedging import get_hedge_policy
+from src.llm import cache_status, deadline, run_sync, submit, track_calls
+from src.parser import SECTION_ORDER
+from src.projection import fit_to_budget, project
+from src.ratelimit import estimate_tokens, get_limiter
+from src.schema_registry import validation_summary
 
 
-def run_pipeline(brd_sections: dict) -> dict:
-    timings = {}
-    start = time.perf_counter()
-    plan_raw = eng_plan_generator(brd_sections)
-    timings["engineering_plan_seconds"] = round(time.perf_counter() - start, 3)
-    plan = apply_guardrails(
-        plan_raw,
-        ["project_overview", "phases", "team_composition", "risks", "assumptions"],
-    )
-    start = time.perf_counter()
-    schedule_raw = schedule_estimator(plan)
-    timings["schedule_estimate_seconds"] = round(time.perf_counter() - start, 3)
-    schedule = apply_guardrails(
-        schedule_raw,
-        ["timeline_weeks", "phases", "resource_matrix", "assumptions", "notes"],
-    )
-    start = time.perf_counter()
-    architecture_raw = solution_architect(brd_sections)
-    timings["solution_architecture_seconds"] = round(time.perf_counter() - start, 3)
-    architecture = apply_guardrails(
-        architecture_raw,
-        ["summary", "components", "data_flows", "non_functional_considerations", "open_questions"],
-    )
-    start = time.perf_counter()
-    poc_raw = poc_planner(architecture)
-    timings["poc_plan_seconds"] = round(time.perf_counter() - start, 3)
-    poc = apply_guardrails(
-        poc_raw,
-        ["poc_goal", "in_scope_components", "out_of_scope", "success_criteria", "timeline_weeks", "risks"],
-    )
-    start = time.perf_counter()
-    tech_stack_raw = tech_stack_recommender(brd_sections)
-    timings["tech_stack_seconds"] = round(time.perf_counter() - start, 3)
-    tech_stack = apply_guardrails(
-        tech_stack_raw,
-        ["options", "recommendation"],
-    )
+# Declared stage graph. Each stage consumes either the parsed BRD sections or
+# the guarded output of exactly one upstream stage, so independent chains
+# (plan -> schedule, architecture -> PoC, tech stack) run as concurrent tasks.
+# ``input_fields`` lists what the agent actually reads from that input; only
+# those fields are sent, and they alone decide whether a stage can be reused.
+# A field is left out only when the agent's prompt has no use for it: the tech
+# stack prompt works from requirements, constraints and NFRs, and the PoC
+# planner from the components and open questions (not NFR notes or diagrams).
+# ``draft`` builds the same artifact offline from the same input (src/draft.py)
+# and ``fallback`` is the empty skeleton used when drafts are disabled.
+STAGES = {
+    "engineering_plan": {
+        "agent": eng_plan_generator_async,
+        "fallback": eng_plan_fallback,
+        "draft": draft.draft_engineering_plan,
+        "depends_on": "brd_sections",
+        "input_fields": [f"sections.{key}" for key in SECTION_ORDER],
+        "required_keys": ["project_overview", "phases", "team_composition", "risks", "assumptions"],
+        "timing_key": "engineering_plan_seconds",
+    },
+    "schedule_estimate": {
+        "agent": schedule_estimator_async,
+        "fallback": schedule_fallback,
+        "draft": draft.draft_schedule,
+        "depends_on": "engineering_plan",
+        # Overview and risks inform durations and buffers, so the whole plan is sent.
+        "input_fields": ["project_overview", "phases", "team_composition", "risks", "assumptions"],
+        "required_keys": ["timeline_weeks", "phases", "resource_matrix", "assumptions", "notes"],
+        "timing_key": "schedule_estimate_seconds",
+    },
+    "solution_architecture": {
+        "agent": solution_architect_async,
+        "fallback": architecture_fallback,
+        "draft": draft.draft_architecture,
+        "depends_on": "brd_sections",
+        # Objectives and assumptions shape the design as much as the requirements do.
+        "input_fields": [f"sections.{key}" for key in SECTION_ORDER],
+        "required_keys": ["summary", "components", "data_flows", "non_functional_considerations", "open_questions"],
+        "timing_key": "solution_architecture_seconds",
+    },
+    "poc_plan": {
+        "agent": poc_planner_async,
+        "fallback": poc_fallback,
+        "draft": draft.draft_poc,
+        "depends_on": "solution_architecture",
+        "input_fields": ["summary", "components", "data_flows", "open_questions"],
+        "required_keys": ["poc_goal", "in_scope_components", "out_of_scope", "success_criteria", "timeline_weeks", "risks"],
+        "timing_key": "poc_plan_seconds",
+    },
+    "tech_stack_recommendations": {
+        "agent": tech_stack_recommender_async,
+        "fallback": tech_stack_fallback,
+        "draft": draft.draft_tech_stack,
+        "depends_on": "brd_sections",
+        "input_fields": [
+            "sections.problem",
+            "sections.functional_requirements",
+            "sections.non_functional_requirements",
+            "sections.constraints",
+            "sections.dependencies",
+        ],
+        "required_keys": ["options", "recommendation"],
+        "timing_key": "tech_stack_seconds",
+    },
+}
+
+
+PIPELINE_MODES = ("llm", "draft")
+
+
+def resolve_mode(mode: str | None) -> str:
+    mode = mode or PIPELINE_MODE
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode {mode!r}; expected one of {PIPELINE_MODES}")
+    return mode
+
+
+def _stage_weight(name: str) -> float:
+    return max(float(PIPELINE_STAGE_WEIGHTS.get(name, 1)), 0.0)
+
+
+def _chain_weight(name: str) -> float:
+    """Weight of ``name`` plus its heaviest chain of downstream stages."""
+    downstream = [child for child, stage in STAGES.items() if stage["depends_on"] == name]
+    return _stage_weight(name) + max((_chain_weight(child) for child in downstream), default=0.0)
+
+
+def _stage_budget(name: str, remaining: float) -> float:
+    """Share of the remaining run deadline a stage may spend, leaving room for its dependents."""
+    chain = _chain_weight(name)
+    share = _stage_weight(name) / chain if chain else 1.0
+    return max(remaining * share, 0.0)
+
+
+async def _run_stage(name: str, upstream: dict, origin: float, on_partial=None, budget: float | None = None) -> dict:
+    stage = STAGES[name]
+    stage_partial = None
+    if on_partial is not None:
+        def stage_partial(key, value):
+            on_partial(name, key, value)
+
+    started = time.perf_counter()
+    timed_out = False
+    with track_calls() as calls, telemetry.stage(name), deadline(budget):
+        try:
+            # LLM calls already honour the budget; this also bounds work outside them.
+            async with asyncio.timeout(budget):
+                raw = await stage["agent"](upstream, on_partial=stage_partial)
+        except TimeoutError:
+            timed_out = True
+            raw = {
+                "_error": f"Stage deadline of {budget:.1f}s exceeded",
+                **degraded_fallback(stage["fallback"], stage["draft"], upstream),
+            }
+    finished = time.perf_counter()
     return {
-        "brd_sections": brd_sections,
-        "engineering_plan": plan,
-        "schedule_estimate": schedule,
-        "solution_architecture": architecture,
-        "poc_plan": poc,
-        "tech_stack_recommendations": tech_stack,
-        "_debug": {
-            "engineering_plan_raw": plan_raw,
-            "schedule_estimate_raw": schedule_raw,
-            "solution_architecture_raw": architecture_raw,
-            "poc_plan_raw": poc_raw,
-            "tech_stack_recommendations_raw": tech_stack_raw,
-            "timings": timings,
-        },
+        "raw": raw,
+        "calls": calls,
+        "output": apply_guardrails(raw, stage["required_keys"]),
+        "started": started - origin,
+        "finished": finished - origin,
+        "budget": budget,
+        "timed_out": timed_out or any(call.get("status") == "timeout" for call in calls),
+    }
+
+
+def _project_input(name: str, upstream: dict) -> tuple[dict, dict]:
+    """Reduce ``upstream`` to the stage's declared fields and fit it into its token budget."""
+    budget = LLM_INPUT_TOKEN_BUDGETS.get(name, LLM_INPUT_TOKEN_BUDGET)
+    projected, fit = fit_to_budget(project(upstream, STAGES[name]["input_fields"]), budget)
+    full_tokens = estimate_tokens(json.dumps(upstream))
+    return projected, {
+        "full_tokens": full_tokens,
+        "projected_tokens": fit["tokens"],
+        "saved_tokens": max(full_tokens - fit["tokens"], 0),
+        "budget_tokens": budget,
+        "truncated": fit["truncated"],
     }
+
+
+def _stage_fingerprint(name: str, projected: dict, mode: str = "llm") -> str:
+    model = OPENAI_MODEL if mode == "llm" else mode
+    return fingerprint({"stage": name, "model": model, "input": projected})
+
+
+def _reusable_output(previous: dict | None, name: str, input_fingerprint: str) -> dict | None:
+    if not previous:
+        return None
+    stored = previous.get("_fingerprints", {}).get("stages", {}).get(name)
+    output = previous.get(name)
+    if stored != input_fingerprint or not isinstance(output, dict) or output.get("_error"):
+        return None
+    return copy.deepcopy(output)
+
+
+def _reused_stage(name: str, output: dict, origin: float, on_partial=None) -> dict:
+    if on_partial is not None:
+        for key, value in output.items():
+            on_partial(name, key, value)
+    now = time.perf_counter() - origin
+    return {"raw": output, "calls": [], "output": output, "started": now, "finished": now, "reused": True}
+
+
+def _draft_stage(name: str, upstream: dict, origin: float, on_partial=None) -> dict:
+    stage = STAGES[name]
+    started = time.perf_counter()
+    raw = stage["draft"](upstream)
+    if on_partial is not None:
+        for key, value in raw.items():
+            on_partial(name, key, value)
+    finished = time.perf_counter()
+    return {
+        "raw": raw,
+        "calls": [],
+        "output": apply_guardrails(raw, stage["required_keys"]),
+        "started": started - origin,
+        "finished": finished - origin,
+    }
+
+
+def _critical_path(results: dict) -> list:
+    if not results:
+        return []
+    name = max(results, key=lambda key: results[key]["finished"])
+    path = [name]
+    while STAGES[name]["depends_on"] in STAGES:
+        name = STAGES[name]["depends_on"]
+        path.append(name)
+    return list(reversed(path))
+
+
+async def _execute_graph(
+    brd_sections: dict,
+    max_workers: int,
+    on_partial=None,
+    previous: dict | None = None,
+    on_stage=None,
+    mode: str = "llm",
+    checkpoint=None,
+    deadline_seconds: float | None = None,
+) -> tuple[dict, float]:
+    origin = time.perf_counter()
+    deadline_at = origin + deadline_seconds if deadline_seconds else None
+    semaphore = asyncio.Semaphore(max(max_workers, 1))
+    tasks = {}
+
+    async def run(name: str) -> dict:
+        dependency = STAGES[name]["depends_on"]
+        upstream = (await tasks[dependency])["output"] if dependency in STAGES else brd_sections
+        projected, projection = _project_input(name, upstream)
+        input_fingerprint = _stage_fingerprint(name, projected, mode)
+        reused = _reusable_output(previous, name, input_fingerprint)
+        if reused is not None:
+            result = _reused_stage(name, reused, origin, on_partial)
+        elif mode == "draft":
+            result = _draft_stage(name, projected, origin, on_partial)
+        else:
+            async with semaphore:
+                budget = None
+                if deadline_at is not None:
+                    budget = _stage_budget(name, deadline_at - time.perf_counter())
+                result = await _run_stage(name, projected, origin, on_partial, budget)
+        result["fingerprint"] = input_fingerprint
+        result["projection"] = projection
+        if checkpoint is not None and not result.get("reused"):
+            checkpoint(name, result["output"], input_fingerprint)
+        if on_stage is not None:
+            on_stage(name, result["output"])
+        return result
+
+    for name in STAGES:
+        tasks[name] = asyncio.create_task(run(name))
+    outputs = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks, outputs)), time.perf_counter() - origin
+
+
+def _incremental_report(previous: dict, results: dict, sections: dict) -> dict:
+    previous_timings = previous.get("_debug", {}).get("timings", {})
+    reused = [name for name in STAGES if results[name].get("reused")]
+    return {
+        "changed_sections": changed_sections(previous.get("_fingerprints", {}).get("sections", {}), sections),
+        "reused_stages": reused,
+        "rerun_stages": [name for name in STAGES if name not in reused],
+        "seconds_saved": round(
+            sum(previous_timings.get(STAGES[name]["timing_key"], 0) for name in reused), 3
+        ),
+    }
+
+
+async def run_pipeline_async(
+    brd_sections: dict,
+    max_workers: int | None = None,
+    on_partial=None,
+    previous: dict | None = None,
+    on_stage=None,
+    mode: str | None = None,
+    checkpoint=None,
+    deadline_seconds: float | None = None,
+) -> dict:
+    """Run the stage graph.
+
+    ``on_partial(stage, key, value)`` streams artifact members as they close
+    and ``on_stage(stage, artifact)`` fires as each stage finishes.
+    ``previous`` is the output of an earlier run for a prior revision of the
+    same BRD: stages whose input fingerprint is unchanged reuse its artifacts.
+    ``mode`` is ``llm`` or ``draft`` (heuristic artifacts, no LLM calls);
+    it defaults to ``PIPELINE_MODE``. ``checkpoint(stage, artifact, fingerprint)``
+    fires for every stage that was executed rather than reused (see src/runstore.py).
+    ``deadline_seconds`` bounds the whole run (default ``PIPELINE_DEADLINE_SECONDS``,
+    0 for none): each stage gets a weighted share of the time left when it starts
+    and falls back instead of waiting once that share is spent.
+    """
+    mode = resolve_mode(mode)
+    if deadline_seconds is None:
+        deadline_seconds = PIPELINE_DEADLINE_SECONDS
+    with track_connections() as connections:
+        results, wall_seconds = await _execute_graph(
+            brd_sections,
+            PIPELINE_MAX_WORKERS if max_workers is None else max_workers,
+            on_partial,
+            previous,
+            on_stage,
+            mode,
+            checkpoint,
+            deadline_seconds,
+        )
+    timings = {
+        STAGES[name]["timing_key"]: round(results[name]["finished"] - results[name]["started"], 3)
+        for name in STAGES
+    }
+    critical_path = _critical_path(results)
+    sections = section_fingerprints(brd_sections)
+    artifacts = {"brd_sections": brd_sections}
+    debug = {"mode": mode}
+    for name in STAGES:
+        artifacts[name] = results[name]["output"]
+        debug[f"{name}_raw"] = results[name]["raw"]
+    debug["timings"] = timings
+    debug["graph"] = {
+        "edges": {name: stage["depends_on"] for name, stage in STAGES.items()},
+        "critical_path": critical_path,
+        "critical_path_seconds": round(
+            sum(timings[STAGES[name]["timing_key"]] for name in critical_path), 3
+        ),
+        "wall_seconds": round(wall_seconds, 3),
+    }
+    debug["validation"] = {name: validation_summary(name, artifacts[name]) for name in STAGES}
+    debug["degraded_stages"] = [name for name in STAGES if results[name]["output"].get("_fallback") == "draft"]
+    debug["cache"] = {
+        name: "reused" if results[name].get("reused") else cache_status(results[name]["calls"])
+        for name in STAGES
+    }
+    if previous is not None:
+        debug["incremental"] = _incremental_report(previous, results, sections)
+    debug["input_projection"] = {
+        "stages": {name: results[name]["projection"] for name in STAGES},
+        "saved_tokens": sum(results[name]["projection"]["saved_tokens"] for name in STAGES),
+    }
+    # Parser calls (LLM fallback or hybrid fill) belong to the same BRD.
+    parser_calls = brd_sections.get("_debug", {}).get("llm_calls", [])
+    debug["telemetry"] = telemetry.summarize(
+        {"brd_parser": parser_calls, **{name: results[name]["calls"] for name in STAGES}}
+    )
+    debug["connections"] = connections
+    debug["rate_limiter"] = get_limiter().snapshot()
+    if deadline_seconds:
+        debug["deadline"] = {
+            "deadline_seconds": deadline_seconds,
+            "stages": {
+                name: {
+                    "budget_seconds": None if results[name].get("budget") is None else round(results[name]["budget"], 3),
+                    "timed_out": results[name].get("timed_out", False),
+                }
+                for name in STAGES
+            },
+            "timed_out_stages": [name for name in STAGES if results[name].get("timed_out")],
+        }
+    if LLM_HEDGE:
+        debug["hedging"] = get_hedge_policy().snapshot()
+    artifacts["_fingerprints"] = {
+        "sections": sections,
+        "stages": {name: results[name]["fingerprint"] for name in STAGES},
+    }
+    artifacts["_debug"] = debug
+    return artifacts
+
+
+def run_pipeline(
+    brd_sections: dict,
+    max_workers: int | None = None,
+    on_partial=None,
+    previous: dict | None = None,
+    on_stage=None,
+    mode: str | None = None,
+    deadline_seconds: float | None = None,
+) -> dict:
+    return run_sync(
+        run_pipeline_async(
+            brd_sections,
+            max_workers=max_workers,
+            on_partial=on_partial,
+            previous=previous,
+            on_stage=on_stage,
+            mode=mode,
+            deadline_seconds=deadline_seconds,
+        )
+    )
+
+
+def stream_pipeline(brd_sections: dict, max_workers: int | None = None):
+    """Yield ``partial`` events while the agents stream, then a final ``done`` event."""
+    events = queue.Queue()
+
+    def on_partial(stage, key, value):
+        events.put({"type": "partial", "stage": stage, "key": key, "value": value})
+
+    future = submit(run_pipeline_async(brd_sections, max_workers=max_workers, on_partial=on_partial))
+    future.add_done_callback(lambda _: events.put(None))
+    while True:
+        event = events.get()
+        if event is None:
+            break
+        yield event
+    yield {"type": "done", "artifacts": future.result()}
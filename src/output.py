@@ -0,0 +1,67 @@
+import gzip
+import json
+from pathlib import Path
+
+from src.orchestrator import STAGES
+
+
+OUTPUT_PROFILES = ("full", "compact", "artifacts")
+
+
+def included(key: str, profile: str) -> bool:
+    """full keeps everything, compact drops ``_debug``, artifacts keeps only the generated artifacts."""
+    if profile == "artifacts":
+        return key in STAGES
+    if profile == "compact":
+        return key != "_debug"
+    return True
+
+
+def select_profile(artifacts: dict, profile: str) -> dict:
+    return {key: value for key, value in artifacts.items() if included(key, profile)}
+
+
+def open_text(path, mode: str = "r"):
+    """Open ``path`` for text I/O, transparently gzip-compressed when it ends in ``.gz``."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return path.open(mode, encoding="utf-8")
+
+
+def read_json(path) -> dict:
+    with open_text(path) as handle:
+        return json.load(handle)
+
+
+class ArtifactWriter:
+    """Write a pipeline result as one JSON object, member by member.
+
+    Each artifact is encoded straight to the file as soon as it is handed
+    over (e.g. from ``run_pipeline(on_stage=writer.write)``), so the whole
+    document never exists as a single string in memory.
+    """
+
+    def __init__(self, handle, profile: str = "full", indent: int | None = 2):
+        self.handle = handle
+        self.profile = profile
+        self.indent = indent or None
+        self.encoder = json.JSONEncoder(indent=self.indent, separators=None if self.indent else (",", ":"))
+        self.written = set()
+
+    def write(self, key: str, value):
+        if key in self.written or not included(key, self.profile):
+            return
+        pad = "\n" + " " * self.indent if self.indent else ""
+        self.handle.write(f"{'{' if not self.written else ','}{pad}{json.dumps(key)}:{' ' if self.indent else ''}")
+        for chunk in self.encoder.iterencode(value):
+            # Newlines only occur between tokens (never inside strings), so this nests the member.
+            self.handle.write(chunk.replace("\n", pad) if pad else chunk)
+        self.written.add(key)
+        self.handle.flush()
+
+    def finish(self, artifacts: dict):
+        """Write whatever the profile keeps that was not streamed yet, then close the object."""
+        for key, value in artifacts.items():
+            self.write(key, value)
+        self.handle.write(("{" if not self.written else "\n" if self.indent else "") + "}\n")
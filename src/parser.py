@@ -1,13 +1,21 @@
+import asyncio
 import json
 import re
 from pathlib import Path
 
-from openai import OpenAI
-
 import os
 
-from src.config import OPENAI_API_KEY, OPENAI_MODEL, SYSTEM_PROMPT
+from src import schema_registry, telemetry
+from src.config import (
+    LLM_BACKEND,
+    OPENAI_API_KEY,
+    PARSER_CHUNK_CHARS,
+    PARSER_CHUNK_CONCURRENCY,
+    PARSER_HYBRID_MIN_CHARS,
+)
 from src.fallback import brd_sections_fallback
+from src.json_extract import extract_json
+from src.llm import cache_status, complete_async, run_sync, track_calls
 
 
 SECTION_ORDER = [
@@ -32,6 +40,35 @@ HEADING_MAP = {
 }
 
 
+def _alias_pattern(alias: str) -> str:
+    words = re.findall(r"[a-z0-9]+", alias.lower())
+    return r"[ \t_-]*".join(re.escape(word) for word in words)
+
+
+def _compile_heading_patterns() -> tuple[re.Pattern, re.Pattern]:
+    # One named group per section key; aliases are matched case-insensitively
+    # with flexible separators ("non-functional", "Non Functional", ...).
+    groups = []
+    for key, aliases in HEADING_MAP.items():
+        patterns = sorted({_alias_pattern(alias) for alias in aliases}, key=len, reverse=True)
+        groups.append(f"(?P<{key}>{'|'.join(patterns)})")
+    alternation = "|".join(groups)
+    numbering = r"\d+(?:\.\d+)*[.)]?[ \t]+"
+    anywhere = re.compile(rf"(?:(?<![\w.]){numbering})?\b(?:{alternation})\b", re.IGNORECASE)
+    whole_heading = re.compile(rf"(?:{numbering})?(?:{alternation})[\s:.-]*", re.IGNORECASE)
+    return anywhere, whole_heading
+
+
+# Compiled once: a single left-to-right scan finds every candidate heading.
+_HEADING_RE, _HEADING_LINE_RE = _compile_heading_patterns()
+_MARKDOWN_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$", flags=re.MULTILINE)
+
+
+def _heading_key(heading: str) -> str | None:
+    match = _HEADING_LINE_RE.fullmatch(heading.strip())
+    return match.lastgroup if match else None
+
+
 def _normalize(text: str) -> str:
     return re.sub(r"\s+", " ", text.strip())
 
@@ -44,15 +81,15 @@ def _split_sections(text: str) -> tuple[dict, dict]:
     if markdown_sections:
         return markdown_sections, debug
 
-    lower = text.lower()
     indices = []
-    for key, headings in HEADING_MAP.items():
-        for heading in headings:
-            match = re.search(rf"\b{re.escape(heading)}\b", lower)
-            if match:
-                indices.append((match.start(), key))
+    seen = set()
+    for match in _HEADING_RE.finditer(text):
+        key = match.lastgroup
+        if key not in seen:
+            seen.add(key)
+            indices.append((match.start(), key))
+            if len(seen) == len(HEADING_MAP):
                 break
-    indices.sort()
     if not indices:
         return sections, debug
 
@@ -62,32 +99,71 @@ def _split_sections(text: str) -> tuple[dict, dict]:
     return sections, debug
 
 
+def _first_section_offset(text: str) -> int:
+    """Offset where the first mapped section starts; text before it belongs to no section."""
+    for match in _MARKDOWN_HEADING_RE.finditer(text):
+        if _heading_key(match.group(2)):
+            return match.start()
+    match = _HEADING_RE.search(text)
+    return match.start() if match else len(text)
+
+
+def _unassigned_spans(text: str) -> list:
+    """``(start, end)`` spans no recognised heading introduces.
+
+    That is the text before the first section and, in markdown BRDs, the body
+    of every unrecognised heading after it (e.g. "## Background"), which the
+    rule-based split folds into the preceding section.
+    """
+    first = _first_section_offset(text)
+    spans = [(0, first)] if first else []
+    headings = list(_MARKDOWN_HEADING_RE.finditer(text))
+    mapped = False
+    for index, match in enumerate(headings):
+        if _heading_key(match.group(2)):
+            mapped = True
+        elif mapped:
+            end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+            spans.append((match.start(), end))
+    return spans
+
+
+def _unassigned_text(text: str) -> str:
+    return "".join(text[start:end] for start, end in _unassigned_spans(text))
+
+
+def _has_unassigned_content(text: str) -> bool:
+    """True when text outside any section is more than a title: headings alone never count."""
+    body = _MARKDOWN_HEADING_RE.sub("", text)
+    return len(" ".join(body.split())) >= PARSER_HYBRID_MIN_CHARS
+
+
 def _split_markdown_sections(text: str) -> tuple[dict, dict]:
     sections = {key: "" for key in SECTION_ORDER}
-    matches = list(re.finditer(r"^(#{1,6})\s+(.+)$", text, flags=re.MULTILINE))
-    if not matches:
-        return {}, {"markdown_detected": False, "mapped_headings": []}
-
     mapped = []
-    for match in matches:
-        heading = match.group(2).strip().lower()
-        for key, headings in HEADING_MAP.items():
-            if any(heading == h for h in headings):
-                mapped.append((match.start(), match.end(), key))
-                break
+    markdown_detected = False
+    for match in _MARKDOWN_HEADING_RE.finditer(text):
+        markdown_detected = True
+        key = _heading_key(match.group(2))
+        if key:
+            mapped.append((match.start(), match.end(), key))
+    if not markdown_detected:
+        return {}, {"markdown_detected": False, "mapped_headings": []}
     if not mapped:
         return {}, {"markdown_detected": True, "mapped_headings": []}
 
-    mapped.sort()
     for i, (start, end_heading, key) in enumerate(mapped):
         end = mapped[i + 1][0] if i + 1 < len(mapped) else len(text)
         sections[key] = _normalize(text[end_heading:end])
     return sections, {"markdown_detected": True, "mapped_headings": [item[2] for item in mapped]}
 
 
-def parse_brd_text(text: str) -> dict:
-    sections, debug = _split_sections(text)
-    payload = {
+def _rule_based_parse(text: str) -> dict:
+    return _sections_payload(*_split_sections(text))
+
+
+def _sections_payload(sections: dict, debug: dict) -> dict:
+    return {
         "schema": "brd_sections_v1",
         "sections": {
             "problem": sections["problem"],
@@ -101,18 +177,103 @@ def parse_brd_text(text: str) -> dict:
         "_llm_fallback_used": False,
         "_debug": debug,
     }
+
+
+def _is_empty(value) -> bool:
+    return not value or (isinstance(value, str) and not value.strip())
+
+
+def _missing_keys(payload: dict) -> list:
+    sections = payload.get("sections", {})
+    return [key for key in SECTION_ORDER if _is_empty(sections.get(key))]
+
+
+def _section_sources(sections: dict, found: set) -> dict:
+    return {
+        key: "missing" if _is_empty(sections.get(key)) else "rule_based" if key in found else "llm"
+        for key in SECTION_ORDER
+    }
+
+
+def _llm_available() -> bool:
+    return bool(OPENAI_API_KEY) or LLM_BACKEND == "mock"
+
+
+def _choose_strategy(payload: dict, unassigned_text, use_llm: bool = True) -> str:
+    """Pick rule_based, hybrid or llm_fallback; ``unassigned_text()`` is only called when needed."""
+    if not use_llm:
+        return "rule_based"
     if _needs_llm_fallback(payload):
-        debug["strategy"] = "llm_fallback"
-        llm_payload = _llm_parse(text)
-        llm_payload["_llm_fallback_used"] = True
-        llm_payload["_debug"] = debug
-        return llm_payload
-    debug["strategy"] = "rule_based"
+        return "llm_fallback"
+    if _missing_keys(payload) and _llm_available() and _has_unassigned_content(unassigned_text()):
+        return "hybrid"
+    return "rule_based"
+
+
+async def _llm_fallback_async(text: str, debug: dict) -> dict:
+    with track_calls() as calls, telemetry.stage("brd_parser"):
+        llm_payload = await _llm_parse_async(text)
+    debug["strategy"] = "llm_fallback"
+    debug["llm_chunks"] = len(calls)
+    debug["llm_calls"] = calls
+    debug["llm_cache"] = cache_status(calls)
+    debug["section_sources"] = _section_sources(llm_payload.get("sections", {}), set())
+    llm_payload["_llm_fallback_used"] = True
+    llm_payload["_debug"] = debug
+    return llm_payload
+
+
+async def _hybrid_fill_async(payload: dict, unassigned: str) -> dict:
+    """Keep the rule-based sections and ask the LLM only for the missing ones."""
+    missing = _missing_keys(payload)
+    found = set(SECTION_ORDER) - set(missing)
+    try:
+        with track_calls() as calls, telemetry.stage("brd_parser"):
+            filled = await _llm_parse_async(unassigned, keys=missing)
+    except Exception as exc:
+        # The rule-based sections are still usable; degrade instead of failing the parse.
+        payload["_debug"]["llm_error"] = str(exc)
+        payload["_debug"]["llm_calls"] = calls
+        return _rule_based_result(payload)
+    for key in missing:
+        payload["sections"][key] = filled["sections"][key]
+    debug = payload["_debug"]
+    debug["strategy"] = "hybrid"
+    debug["llm_chunks"] = len(calls)
+    debug["llm_calls"] = calls
+    debug["llm_cache"] = cache_status(calls)
+    debug["section_sources"] = _section_sources(payload["sections"], found)
+    return payload
+
+
+def _rule_based_result(payload: dict) -> dict:
+    payload["_debug"]["strategy"] = "rule_based"
+    payload["_debug"]["section_sources"] = _section_sources(payload["sections"], set(SECTION_ORDER))
     if os.getenv("PARSER_DEBUG") == "1":
         print("PARSER_DEBUG:", json.dumps(payload["_debug"]))
     return payload
 
 
+def parse_brd_text(text: str, use_llm: bool = True) -> dict:
+    payload = _rule_based_parse(text)
+    strategy = _choose_strategy(payload, lambda: _unassigned_text(text), use_llm)
+    if strategy == "llm_fallback":
+        return run_sync(_llm_fallback_async(text, payload["_debug"]))
+    if strategy == "hybrid":
+        return run_sync(_hybrid_fill_async(payload, _unassigned_text(text)))
+    return _rule_based_result(payload)
+
+
+async def parse_brd_text_async(text: str, use_llm: bool = True) -> dict:
+    payload = _rule_based_parse(text)
+    strategy = _choose_strategy(payload, lambda: _unassigned_text(text), use_llm)
+    if strategy == "llm_fallback":
+        return await _llm_fallback_async(text, payload["_debug"])
+    if strategy == "hybrid":
+        return await _hybrid_fill_async(payload, _unassigned_text(text))
+    return _rule_based_result(payload)
+
+
 def _to_list(text: str) -> list:
     if not text:
         return []
@@ -157,21 +318,132 @@ def _load_prompt() -> str:
     )
 
 
-def _llm_parse(text: str) -> dict:
-    if not OPENAI_API_KEY:
-        return brd_sections_fallback()
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    prompt = f"{_load_prompt()}\n\nInput BRD text:\n{text}"
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
-    content = response.choices[0].message.content or "{}"
+def _chunk_paragraphs(text: str, max_chars: int) -> list:
+    """Pack whole paragraphs into chunks of at most ``max_chars``.
+
+    A paragraph longer than the limit is split on line boundaries, and a
+    single oversized line is cut at the limit.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            pieces.extend(line[i:i + max_chars] for i in range(0, max(len(line), 1), max_chars))
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _dedupe_key(item: str) -> str:
+    return re.sub(r"\s+", " ", item).strip().rstrip(".;").casefold()
+
+
+def _merge_llm_sections(payloads: list) -> dict:
+    """Reduce per-chunk parser payloads into one, keeping the first copy of each bullet."""
+    merged = brd_sections_fallback()
+    sections = merged["sections"]
+    seen = {key: set() for key in sections}
+    problems = []
+    for payload in payloads:
+        for key, value in (payload.get("sections") or {}).items():
+            if key not in sections:
+                continue
+            if key == "problem":
+                if isinstance(value, str) and value.strip() and _dedupe_key(value) not in seen[key]:
+                    seen[key].add(_dedupe_key(value))
+                    problems.append(value.strip())
+                continue
+            items = value if isinstance(value, list) else _to_list(value if isinstance(value, str) else "")
+            for item in items:
+                if isinstance(item, str) and item.strip() and _dedupe_key(item) not in seen[key]:
+                    seen[key].add(_dedupe_key(item))
+                    sections[key].append(item.strip())
+    sections["problem"] = " ".join(problems)
+    return merged
+
+
+def _sections_schema(keys: list | None) -> dict:
+    schema = schema_registry.get_schema("brd_sections")
+    if keys is None:
+        return schema
+    sections = schema["properties"]["sections"]
+    return {
+        **schema,
+        "properties": {
+            **schema["properties"],
+            "sections": {
+                **sections,
+                "required": keys,
+                "properties": {key: sections["properties"][key] for key in keys},
+            },
+        },
+    }
+
+
+async def _llm_parse_chunk_async(prompt: str, schema: dict) -> dict:
     try:
-        return json.loads(content)
+        return await complete_async(
+            prompt, temperature=0.2, parse=extract_json, schema=schema, schema_name="brd_sections"
+        )
     except json.JSONDecodeError:
         return brd_sections_fallback()
+
+
+def _missing_sections_prompt(keys: list) -> str:
+    shape = ",\n".join(f'    "{key}": {json.dumps(brd_sections_fallback()["sections"][key])}' for key in keys)
+    return (
+        "You are a BRD parser.\n\n"
+        "The other sections of this BRD were already extracted. From the text below, "
+        f"extract only these sections: {', '.join(keys)}.\n"
+        "Return JSON only with this structure:\n"
+        "{\n"
+        '  "schema": "brd_sections_v1",\n'
+        '  "sections": {\n'
+        f"{shape}\n"
+        "  }\n"
+        "}\n"
+        "Rules:\n"
+        "- Extract concise bullet strings into arrays.\n"
+        "- If a section is not in the text, return an empty array or empty string.\n"
+        "- Do not add extra keys."
+    )
+
+
+async def _llm_parse_async(text: str, keys: list | None = None) -> dict:
+    """LLM section extraction; with ``keys`` only those sections are requested."""
+    if not _llm_available():
+        return brd_sections_fallback()
+    header = _load_prompt() if keys is None else _missing_sections_prompt(keys)
+    schema = _sections_schema(keys)
+    if len(text) <= PARSER_CHUNK_CHARS:
+        result = await _llm_parse_chunk_async(f"{header}\n\nInput BRD text:\n{text}", schema)
+        return result if keys is None else _merge_llm_sections([result])
+
+    # Map: extract sections from each chunk concurrently, so latency follows the
+    # slowest chunk rather than document length. Reduce: merge and dedupe.
+    chunks = _chunk_paragraphs(text, PARSER_CHUNK_CHARS)
+    semaphore = asyncio.Semaphore(max(PARSER_CHUNK_CONCURRENCY, 1))
+
+    async def extract(index: int, chunk: str) -> dict:
+        prompt = f"{header}\n\nInput BRD text (part {index} of {len(chunks)}):\n{chunk}"
+        async with semaphore:
+            return await _llm_parse_chunk_async(prompt, schema)
+
+    payloads = await asyncio.gather(*(extract(index, chunk) for index, chunk in enumerate(chunks, start=1)))
+    return _merge_llm_sections(payloads)
+
+
+def _llm_parse(text: str) -> dict:
+    return run_sync(_llm_parse_async(text))
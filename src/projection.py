@@ -0,0 +1,69 @@
+import json
+
+from src.ratelimit import estimate_tokens
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def project(payload: dict, fields: list) -> dict:
+    """Keep only ``fields`` of ``payload``; dotted names (``sections.problem``) select nested keys."""
+    projected = {}
+    for field in fields:
+        source, target = payload, projected
+        *parents, leaf = field.split(".")
+        for part in parents:
+            source = source.get(part) if isinstance(source, dict) else None
+            target = target.setdefault(part, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+    return projected
+
+
+def _trim(value, max_items: int, max_chars: int):
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[: max_chars - 3] + "..."
+    if isinstance(value, list):
+        kept = [_trim(item, max_items, max_chars) for item in value[:max_items]]
+        omitted = len(value) - len(kept)
+        if omitted and all(isinstance(item, str) for item in value):
+            kept.append(f"({omitted} more omitted)")
+        return kept
+    if isinstance(value, dict):
+        return {key: _trim(item, max_items, max_chars) for key, item in value.items()}
+    return value
+
+
+def _longest(value) -> tuple[int, int]:
+    """Return (longest list length, longest string length) anywhere in ``value``."""
+    if isinstance(value, str):
+        return 0, len(value)
+    children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else []
+    items = len(value) if isinstance(value, list) else 0
+    chars = 0
+    for child in children:
+        child_items, child_chars = _longest(child)
+        items, chars = max(items, child_items), max(chars, child_chars)
+    return items, chars
+
+
+def fit_to_budget(value: dict, budget_tokens: int, min_items: int = 3, min_chars: int = 120) -> tuple[dict, dict]:
+    """Shrink ``value`` until its compact JSON fits ``budget_tokens``.
+
+    Every list is cut to its first N items and every string to M characters,
+    shrinking N and M together by a quarter per step until the payload fits or both reach their floor.
+    The same input and budget always give the same output, so cache keys and
+    fingerprints stay stable.
+    """
+    tokens = estimate_tokens(compact_json(value))
+    if tokens <= budget_tokens:
+        return value, {"truncated": False, "tokens": tokens}
+    max_items, max_chars = _longest(value)
+    trimmed = value
+    while tokens > budget_tokens and (max_items > min_items or max_chars > min_chars):
+        max_items = max(min_items, max_items * 3 // 4)
+        max_chars = max(min_chars, max_chars * 3 // 4)
+        trimmed = _trim(value, max_items, max_chars)
+        tokens = estimate_tokens(compact_json(trimmed))
+    return trimmed, {"truncated": True, "tokens": tokens, "max_items": max_items, "max_chars": max_chars}
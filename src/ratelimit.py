@@ -0,0 +1,236 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import openai
+
+from src.config import (
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_INITIAL_CONCURRENCY,
+    LLM_LATENCY_TARGET_SECONDS,
+    LLM_MAX_CONCURRENCY,
+    LLM_MIN_CONCURRENCY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Per-minute token bucket. Reservations may overdraw; the caller sleeps off the debt."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = max(per_minute, 1.0)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def try_reserve(self, amount: float) -> bool:
+        """Take ``amount`` only if it is available now; never overdraws."""
+        with self._lock:
+            self._refill()
+            if self.tokens < min(amount, self.capacity):
+                return False
+            self.tokens -= min(amount, self.capacity)
+            return True
+
+    def adjust(self, amount: float):
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+class AdaptiveRateLimiter:
+    """Process-wide RPM/TPM buckets plus an AIMD concurrency window.
+
+    The window grows by roughly one slot per window of successful calls and is
+    halved on a 429 (or shrunk when latency exceeds the target). State is
+    guarded by a thread lock so any event loop in the process can share it.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute: float = LLM_TOKENS_PER_MINUTE,
+        min_concurrency: int = LLM_MIN_CONCURRENCY,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        initial_concurrency: int = LLM_INITIAL_CONCURRENCY,
+        latency_target: float = LLM_LATENCY_TARGET_SECONDS,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.min_concurrency = max(min_concurrency, 1)
+        self.max_concurrency = max(max_concurrency, self.min_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.counters = {"calls": 0, "hedges": 0, "rate_limited": 0, "retries": 0, "slow_calls": 0, "waited_seconds": 0.0}
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            loop, waiter = self._waiters.popleft()
+            loop.call_soon_threadsafe(_resolve, waiter)
+            free -= 1
+
+    async def _enter(self):
+        while True:
+            with self._lock:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                loop = asyncio.get_running_loop()
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                    self._wake()
+                raise
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        started = time.perf_counter()
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._enter()
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["waited_seconds"] += time.perf_counter() - started
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def try_reserve(self, estimated_tokens: int) -> bool:
+        """Reserve one request and ``estimated_tokens`` without waiting, for a hedge.
+
+        Hedges run inside the primary call's concurrency slot, but their RPM/TPM
+        usage is real, so they only go out when the buckets can cover them now.
+        """
+        if not self.requests.try_reserve(1):
+            return False
+        if not self.tokens.try_reserve(estimated_tokens):
+            self.requests.adjust(-1)
+            return False
+        with self._lock:
+            self.counters["hedges"] += 1
+        return True
+
+    def on_success(self, latency: float, token_delta: int = 0):
+        if token_delta:
+            self.tokens.adjust(token_delta)
+        with self._lock:
+            if self.latency_target and latency > self.latency_target:
+                self.counters["slow_calls"] += 1
+                self.limit = max(self.min_concurrency, self.limit * 0.8)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            self._wake()
+
+    def on_error(self, exc: Exception):
+        with self._lock:
+            self.counters["retries"] += 1
+            if isinstance(exc, openai.RateLimitError):
+                self.counters["rate_limited"] += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                **self.counters,
+            }
+        state["waited_seconds"] = round(state["waited_seconds"], 3)
+        state["requests_available"] = round(self.requests.available(), 1)
+        state["tokens_available"] = round(self.tokens.available(), 1)
+        return state
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def get_limiter() -> AdaptiveRateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = AdaptiveRateLimiter()
+    return _limiter
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(ceiling / 2, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
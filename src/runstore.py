@@ -0,0 +1,229 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from src.config import RUN_STORE_MAX_RUNS, RUN_STORE_PATH
+from src.fingerprints import section_fingerprints
+from src.llm import run_sync
+from src.orchestrator import STAGES, resolve_mode, run_pipeline_async
+from src.parser import parse_brd_text_async
+
+
+# Every stage output of a checkpointed run (parsed sections first, then each
+# artifact) is written here as soon as it completes. Resuming a run feeds the
+# stored outputs back to the pipeline as ``previous``, so only stages that are
+# missing, failed or whose inputs changed are executed again.
+
+RESUMABLE_STATUSES = ("running", "failed", "partial")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def input_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RunStore:
+    """SQLite-backed store of pipeline runs and their per-stage checkpoints."""
+
+    def __init__(self, path: str, max_runs: int = RUN_STORE_MAX_RUNS):
+        self.path = Path(path)
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, input_hash TEXT NOT NULL, input_text TEXT NOT NULL, mode TEXT NOT NULL, "
+            "status TEXT NOT NULL, error TEXT NOT NULL DEFAULT '', created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "run_id TEXT NOT NULL, stage TEXT NOT NULL, status TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "output TEXT NOT NULL, updated REAL NOT NULL, PRIMARY KEY (run_id, stage))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_input ON runs (input_hash, mode, created)")
+        self._conn.commit()
+
+    def create_run(self, text: str, mode: str, run_id: str | None = None) -> str:
+        run_id = run_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, input_hash, input_text, mode, status, created, updated) "
+                "VALUES (?, ?, ?, ?, 'running', ?, ?)",
+                (run_id, input_hash(text), text, mode, now, now),
+            )
+            self._prune()
+            self._conn.commit()
+        return run_id
+
+    def _prune(self):
+        stale = self._conn.execute(
+            "SELECT run_id FROM runs ORDER BY created DESC LIMIT -1 OFFSET ?", (max(self.max_runs, 1),)
+        ).fetchall()
+        self._conn.executemany("DELETE FROM stages WHERE run_id = ?", stale)
+        self._conn.executemany("DELETE FROM runs WHERE run_id = ?", stale)
+
+    def get_run(self, run_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, input_hash, mode, status, error, created, updated FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("run_id", "input_hash", "mode", "status", "error", "created", "updated"), row))
+
+    def input_text(self, run_id: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT input_text FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def latest_resumable(self, text: str, mode: str) -> str | None:
+        placeholders = ", ".join("?" for _ in RESUMABLE_STATUSES)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT run_id FROM runs WHERE input_hash = ? AND mode = ? AND status IN ({placeholders}) "
+                "ORDER BY created DESC LIMIT 1",
+                (input_hash(text), mode, *RESUMABLE_STATUSES),
+            ).fetchone()
+        return row[0] if row else None
+
+    def incomplete_runs(self) -> list:
+        with self._lock:
+            rows = self._conn.execute("SELECT run_id FROM runs WHERE status = 'running' ORDER BY created").fetchall()
+        return [row[0] for row in rows]
+
+    def save_stage(self, run_id: str, stage: str, output: dict, fingerprint: str = ""):
+        status = "error" if output.get("_error") else "done"
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (run_id, stage, status, fingerprint, output, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, stage, status, fingerprint, json.dumps(output), time.time()),
+            )
+            self._conn.execute("UPDATE runs SET updated = ? WHERE run_id = ?", (time.time(), run_id))
+            self._conn.commit()
+
+    def load_stages(self, run_id: str) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, status, fingerprint, output FROM stages WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {
+            stage: {"status": status, "fingerprint": fingerprint, "output": json.loads(output)}
+            for stage, status, fingerprint, output in rows
+        }
+
+    def set_status(self, run_id: str, status: str, error: str = ""):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, error = ?, updated = ? WHERE run_id = ?",
+                (status, error, time.time(), run_id),
+            )
+            self._conn.commit()
+
+
+def get_store() -> RunStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RunStore(RUN_STORE_PATH)
+    return _store
+
+
+def _previous(stages: dict, brd_sections: dict) -> dict:
+    """Shape stored checkpoints like an earlier pipeline output, for stage reuse."""
+    previous = {name: stages[name]["output"] for name in STAGES if name in stages}
+    previous["_fingerprints"] = {
+        "sections": section_fingerprints(brd_sections),
+        "stages": {name: stages[name]["fingerprint"] for name in STAGES if name in stages},
+    }
+    return previous
+
+
+async def run_checkpointed_async(
+    text: str,
+    run_id: str | None = None,
+    mode: str | None = None,
+    store: RunStore | None = None,
+    on_partial=None,
+    on_stage=None,
+    deadline_seconds: float | None = None,
+) -> dict:
+    """Parse and run ``text`` with every stage checkpointed in the run store.
+
+    An existing ``run_id`` is resumed; without one, the latest unfinished run
+    for the same input and mode is resumed, or a new run is started.
+    """
+    store = store or get_store()
+    run = store.get_run(run_id) if run_id else None
+    if run is not None and run["input_hash"] != input_hash(text):
+        raise ValueError(f"Run {run_id} was started for a different input")
+    mode = resolve_mode(mode or (run["mode"] if run else None))
+    if run is None:
+        existing = None if run_id else store.latest_resumable(text, mode)
+        run_id = existing or store.create_run(text, mode, run_id)
+    store.set_status(run_id, "running")
+    stages = store.load_stages(run_id)
+    resumed = sorted(name for name, stage in stages.items() if stage["status"] == "done")
+
+    def checkpoint(name, output, fingerprint):
+        store.save_stage(run_id, name, output, fingerprint)
+
+    try:
+        if "brd_sections" in stages:
+            brd_sections = stages["brd_sections"]["output"]
+            # Those parser calls were made (and reported) by an earlier attempt.
+            brd_sections.get("_debug", {}).pop("llm_calls", None)
+        else:
+            brd_sections = await parse_brd_text_async(text, use_llm=mode == "llm")
+            store.save_stage(run_id, "brd_sections", brd_sections)
+        artifacts = await run_pipeline_async(
+            brd_sections,
+            previous=_previous(stages, brd_sections) if stages else None,
+            on_partial=on_partial,
+            on_stage=on_stage,
+            mode=mode,
+            checkpoint=checkpoint,
+            deadline_seconds=deadline_seconds,
+        )
+    except BaseException as exc:
+        store.set_status(run_id, "failed", str(exc) or type(exc).__name__)
+        raise
+    failed = [name for name in STAGES if artifacts[name].get("_error")]
+    store.set_status(run_id, "partial" if failed else "done", ", ".join(failed))
+    artifacts["_debug"]["run_store"] = {
+        "run_id": run_id,
+        "checkpointed_before": resumed,
+        "failed_stages": failed,
+    }
+    return artifacts
+
+
+def run_checkpointed(
+    text: str,
+    run_id: str | None = None,
+    mode: str | None = None,
+    store: RunStore | None = None,
+) -> dict:
+    return run_sync(run_checkpointed_async(text, run_id=run_id, mode=mode, store=store))
+
+
+async def resume_async(run_id: str, store: RunStore | None = None) -> dict:
+    store = store or get_store()
+    run = store.get_run(run_id)
+    if run is None:
+        raise KeyError(f"Unknown run {run_id}")
+    return await run_checkpointed_async(store.input_text(run_id), run_id=run_id, mode=run["mode"], store=store)
+
+
+def resume(run_id: str, store: RunStore | None = None) -> dict:
+    return run_sync(resume_async(run_id, store=store))
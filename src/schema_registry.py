@@ -0,0 +1,78 @@
+import json
+import threading
+from pathlib import Path
+
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+
+SCHEMA_DIR = Path(__file__).resolve().parents[1] / "schemas"
+
+ARTIFACT_SCHEMAS = {
+    "brd_sections": "brd_sections.schema.json",
+    "engineering_plan": "engineering_plan.schema.json",
+    "schedule_estimate": "schedule_estimate.schema.json",
+    "solution_architecture": "solution_architecture.schema.json",
+    "poc_plan": "poc_plan.schema.json",
+    "tech_stack_recommendations": "tech_stack.schema.json",
+}
+
+_schemas = {}
+_validators = {}
+_lock = threading.Lock()
+
+
+def _load():
+    # Every schema is read and checked once per process; validators are reused.
+    with _lock:
+        if _validators:
+            return
+        for path in sorted(SCHEMA_DIR.glob("*.schema.json")):
+            schema = json.loads(path.read_text(encoding="utf-8"))
+            cls = validator_for(schema)
+            cls.check_schema(schema)
+            _schemas[path.name] = schema
+            _validators[path.name] = cls(schema)
+
+
+def _file_name(name: str) -> str:
+    return ARTIFACT_SCHEMAS.get(name, name)
+
+
+def get_schema(name: str) -> dict:
+    """Return a schema by artifact key (``engineering_plan``) or file name."""
+    _load()
+    return _schemas[_file_name(name)]
+
+
+def get_validator(name: str):
+    _load()
+    return _validators[_file_name(name)]
+
+
+def is_valid(name: str, instance) -> bool:
+    return get_validator(name).is_valid(instance)
+
+
+def iter_errors(name: str, instance):
+    return get_validator(name).iter_errors(instance)
+
+
+def first_error(name: str, instance):
+    """Return the most relevant ValidationError (as ``jsonschema.validate`` would raise) or None."""
+    if is_valid(name, instance):
+        return None
+    return best_match(iter_errors(name, instance))
+
+
+def validate(name: str, instance):
+    error = first_error(name, instance)
+    if error is not None:
+        raise error
+
+
+def validation_summary(name: str, instance) -> dict:
+    error = first_error(name, instance)
+    if error is None:
+        return {"valid": True, "error": ""}
+    return {"valid": False, "error": str(error).splitlines()[0]}
@@ -0,0 +1,345 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from src import runstore, singleflight, telemetry
+from src.config import (
+    PIPELINE_MODE,
+    SERVER_HOST,
+    SERVER_MAX_BODY_BYTES,
+    SERVER_MAX_JOBS,
+    SERVER_PORT,
+    SERVER_QUEUE_SIZE,
+    SERVER_WORKERS,
+)
+from src.llm import run_sync
+from src.orchestrator import PIPELINE_MODES, STAGES, run_pipeline_async
+from src.output import OUTPUT_PROFILES, select_profile
+from src.parser import parse_brd_text_async
+
+
+# Long-running HTTP entry point. Submissions go into a bounded queue drained by
+# a fixed pool of worker threads; every worker runs the pipeline through the
+# shared background event loop, so all jobs reuse one warm LLM client and
+# connection pool. A full queue is rejected with 429 instead of growing.
+
+
+class JobService:
+    def __init__(
+        self,
+        workers: int = SERVER_WORKERS,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        max_jobs: int = SERVER_MAX_JOBS,
+        store: runstore.RunStore | None = None,
+    ):
+        self.workers = max(workers, 1)
+        self.store = store
+        self.queue = queue.Queue(maxsize=max(queue_size, 1))
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0}
+        self.threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"brd-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def submit(self, text: str, mode: str = PIPELINE_MODE, job_id: str | None = None) -> dict | None:
+        """Queue a BRD; returns the job, or ``None`` when the queue is full."""
+        job = {
+            "id": job_id or uuid.uuid4().hex,
+            "status": "queued",
+            "mode": mode,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "stages": {name: "pending" for name in STAGES},
+            "error": "",
+            "coalesced": False,
+            "result": None,
+        }
+        with self.lock:
+            try:
+                self.queue.put_nowait((job, text))
+            except queue.Full:
+                self.counts["rejected"] += 1
+                return None
+            self.jobs[job["id"]] = job
+            self.counts["submitted"] += 1
+            self._evict()
+        return job
+
+    def recover(self) -> list:
+        """Re-queue runs a previous process left unfinished; checkpointed stages are not redone."""
+        recovered = []
+        for run_id in self.store.incomplete_runs() if self.store else []:
+            run = self.store.get_run(run_id)
+            if self.submit(self.store.input_text(run_id), run["mode"], job_id=run_id) is None:
+                break
+            recovered.append(run_id)
+        return recovered
+
+    def _evict(self):
+        overflow = len(self.jobs) - self.max_jobs
+        if overflow > 0:
+            finished = sorted(
+                (job["finished_at"], job_id) for job_id, job in self.jobs.items() if job["finished_at"] is not None
+            )
+            for _, job_id in finished[:overflow]:
+                del self.jobs[job_id]
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    async def _execute(self, job: dict, text: str, on_stage) -> dict:
+        if self.store is not None:
+            # The job ID doubles as the run ID, so a crashed job resumes under the same ID.
+            return await runstore.run_checkpointed_async(
+                text, run_id=job["id"], mode=job["mode"], store=self.store, on_stage=on_stage
+            )
+        brd_sections = await parse_brd_text_async(text, use_llm=job["mode"] == "llm")
+        return await run_pipeline_async(brd_sections, on_stage=on_stage, mode=job["mode"])
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            job, text = item
+            job["status"] = "running"
+            job["started_at"] = time.time()
+
+            def on_stage(name, output):
+                job["stages"][name] = "error" if output.get("_error") else "done"
+
+            try:
+                # Identical BRDs running at the same time share one execution.
+                key = (runstore.input_hash(text), job["mode"])
+                result, shared = run_sync(singleflight.runs.do(key, lambda: self._execute(job, text, on_stage)))
+                if shared:
+                    for name in STAGES:
+                        on_stage(name, result[name])
+                job["result"] = result
+                job["coalesced"] = shared
+                job["status"] = "done"
+            except Exception as exc:
+                job["error"] = str(exc)
+                job["status"] = "failed"
+            job["finished_at"] = time.time()
+            with self.lock:
+                self.counts[job["status"]] += 1
+            self.queue.task_done()
+
+    def status(self, job: dict) -> dict:
+        finished = job["finished_at"] or time.time()
+        return {
+            "id": job["id"],
+            "status": job["status"],
+            "mode": job["mode"],
+            "submitted_at": job["submitted_at"],
+            "queued_seconds": round((job["started_at"] or finished) - job["submitted_at"], 3),
+            "run_seconds": round(finished - job["started_at"], 3) if job["started_at"] else 0.0,
+            "stages": dict(job["stages"]),
+            "coalesced": job["coalesced"],
+            "error": job["error"],
+        }
+
+    def queue_info(self) -> dict:
+        with self.lock:
+            by_status = {}
+            for job in self.jobs.values():
+                by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+            counts = dict(self.counts)
+        return {
+            "depth": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "workers": self.workers,
+            "running": by_status.get("running", 0),
+            "inflight_runs": singleflight.runs.inflight(),
+            "jobs": by_status,
+            "totals": counts,
+        }
+
+    def metrics_text(self) -> str:
+        info = self.queue_info()
+        lines = [
+            "# TYPE brd_server_queue_depth gauge",
+            f"brd_server_queue_depth {info['depth']}",
+            "# TYPE brd_server_queue_capacity gauge",
+            f"brd_server_queue_capacity {info['capacity']}",
+            "# TYPE brd_server_jobs_running gauge",
+            f"brd_server_jobs_running {info['running']}",
+            "# TYPE brd_server_jobs_total counter",
+        ]
+        lines += [f'brd_server_jobs_total{{outcome="{name}"}} {value}' for name, value in sorted(info["totals"].items())]
+        return "\n".join(lines) + "\n" + telemetry.prometheus_text()
+
+
+class Handler(BaseHTTPRequestHandler):
+    service: JobService = None
+    server_version = "BRDProcessor"
+
+    def _send(self, status: int, body, content_type: str = "application/json", headers: dict | None = None):
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, headers: dict | None = None):
+        self._send(status, {"error": message}, headers=headers)
+
+    def _read_submission(self) -> tuple[str, str] | None:
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body cannot be delimited, so the connection cannot be reused either.
+            self.close_connection = True
+            self._error(HTTPStatus.BAD_REQUEST, "Content-Length must be a non-negative integer")
+            return None
+        if length == 0:
+            self._error(HTTPStatus.BAD_REQUEST, "Request body must contain the BRD text")
+            return None
+        if length > SERVER_MAX_BODY_BYTES:
+            self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"BRD larger than {SERVER_MAX_BODY_BYTES} bytes")
+            return None
+        body = self.rfile.read(length).decode("utf-8", errors="ignore")
+        params = parse_qs(urlsplit(self.path).query)
+        mode = params.get("mode", [PIPELINE_MODE])[0]
+        if self.headers.get_content_type() == "application/json":
+            try:
+                payload = json.loads(body)
+            except json.JSONDecodeError as exc:
+                self._error(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {exc}")
+                return None
+            if not isinstance(payload, dict):
+                self._error(HTTPStatus.BAD_REQUEST, 'JSON body must be an object with a "text" string')
+                return None
+            body = payload.get("text")
+            mode = payload.get("mode", mode)
+            if not isinstance(body, str):
+                self._error(HTTPStatus.BAD_REQUEST, '"text" must be a string containing the BRD')
+                return None
+        if not body.strip():
+            self._error(HTTPStatus.BAD_REQUEST, "Request body must contain the BRD text")
+            return None
+        if not isinstance(mode, str) or mode not in PIPELINE_MODES:
+            self._error(HTTPStatus.BAD_REQUEST, f"mode must be one of {', '.join(PIPELINE_MODES)}")
+            return None
+        return body, mode
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/jobs":
+            self._error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        submission = self._read_submission()
+        if submission is None:
+            return
+        job = self.service.submit(*submission)
+        if job is None:
+            self._error(HTTPStatus.TOO_MANY_REQUESTS, "Job queue is full; retry later", {"Retry-After": "5"})
+            return
+        self._send(HTTPStatus.ACCEPTED, self.service.status(job), headers={"Location": f"/jobs/{job['id']}"})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            self._send(HTTPStatus.OK, {"status": "ok", "uptime_seconds": round(time.time() - self.service.started, 1)})
+        elif parts == ["queue"]:
+            self._send(HTTPStatus.OK, self.service.queue_info())
+        elif parts == ["metrics"]:
+            self._send(HTTPStatus.OK, self.service.metrics_text(), "text/plain; version=0.0.4")
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and parts[2:] in ([], ["result"]):
+            job = self.service.get(parts[1])
+            if job is None:
+                self._error(HTTPStatus.NOT_FOUND, "Unknown job")
+            elif len(parts) == 2:
+                self._send(HTTPStatus.OK, self.service.status(job))
+            else:
+                self._send_result(job, parse_qs(url.query).get("profile", ["full"])[0])
+        else:
+            self._error(HTTPStatus.NOT_FOUND, "Not found")
+
+    def _send_result(self, job: dict, profile: str):
+        if profile not in OUTPUT_PROFILES:
+            self._error(HTTPStatus.BAD_REQUEST, f"profile must be one of {', '.join(OUTPUT_PROFILES)}")
+        elif job["status"] == "done":
+            self._send(HTTPStatus.OK, select_profile(job["result"], profile))
+        elif job["status"] == "failed":
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, job["error"])
+        else:
+            self._send(HTTPStatus.ACCEPTED, self.service.status(job))
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host: str, port: int, service: JobService, verbose: bool = False) -> ThreadingHTTPServer:
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BRD-to-Engineering HTTP service")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="BRDs processed concurrently")
+    parser.add_argument("--queue-size", type=int, default=SERVER_QUEUE_SIZE, help="Queued BRDs before 429s")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not checkpoint jobs in the run store")
+    parser.add_argument("--recover", action="store_true", help="Re-queue jobs a previous server left unfinished")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    store = None if args.no_checkpoint else runstore.get_store()
+    service = JobService(workers=args.workers, queue_size=args.queue_size, store=store)
+    if args.recover:
+        recovered = service.recover()
+        print(f"Recovered {len(recovered)} unfinished job(s)")
+    service.start()
+    server = make_server(args.host, args.port, service, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_port} (workers={service.workers}, queue={args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
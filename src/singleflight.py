@@ -0,0 +1,58 @@
+import asyncio
+
+from src import telemetry
+from src.config import COALESCE_REQUESTS
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs ``factory()``; callers that
+    arrive while it is in flight wait for the same result instead of starting
+    their own. Nothing is kept once the leader finishes, so this deduplicates
+    concurrent work only; caching is a separate concern.
+    """
+
+    def __init__(self, level: str):
+        self.level = level
+        self._inflight = {}
+
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key, factory) -> tuple:
+        """Return ``(result, shared)``; ``shared`` is True for callers that waited on a leader."""
+        if not COALESCE_REQUESTS:
+            return await factory(), False
+        loop = asyncio.get_running_loop()
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is loop:
+            telemetry.increment("brd_coalesced_total", (("level", self.level),))
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                # Only a cancelled leader is recovered from: run it ourselves.
+                if not future.cancelled():
+                    raise
+
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+runs = SingleFlight("run")
+prompts = SingleFlight("prompt")
@@ -0,0 +1,274 @@
+import tempfile
+
+from src.parser import (
+    HEADING_MAP,
+    SECTION_ORDER,
+    _HEADING_RE,
+    _choose_strategy,
+    _heading_key,
+    _hybrid_fill_async,
+    _llm_fallback_async,
+    _rule_based_result,
+    _sections_payload,
+)
+from src.llm import run_sync
+
+
+# Text kept in memory before the spool used for the LLM fallback moves to disk.
+SPOOL_MAX_BYTES = 1024 * 1024
+MAX_HEADING_HASHES = 6
+
+
+class _SectionText:
+    """Whitespace-normalized text built incrementally (same result as parser._normalize)."""
+
+    def __init__(self):
+        self.parts = []
+        self.started = False
+        self.pending_space = False
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        words = chunk.split()
+        if not words:
+            self.pending_space = self.started
+            return
+        if self.started and (self.pending_space or chunk[0].isspace()):
+            self.parts.append(" ")
+        self.parts.append(" ".join(words))
+        self.started = True
+        self.pending_space = chunk[-1].isspace()
+
+    def text(self) -> str:
+        return "".join(self.parts)
+
+
+class _MarkdownState:
+    """Line-at-a-time equivalent of ``^(#{1,6})\\s+(.+)$`` (MULTILINE) sectioning.
+
+    ``\\s+`` may run across blank lines, so a ``#`` line with nothing after the
+    hashes stays pending until the next non-blank line supplies its text.
+    """
+
+    def __init__(self):
+        self.detected = False
+        self.mapped = []
+        self.sections = {}
+        self.current = None
+        self.pending = None
+        # Offsets (in characters) used to find text that precedes every section
+        # and the spans under unrecognised headings (see parser._unassigned_spans).
+        self.line_start = 0
+        self.heading_start = 0
+        self.first_offset = None
+        self.spans = []
+        self.open_span = None
+
+    def _open(self, key: str):
+        if self.first_offset is None:
+            self.first_offset = self.heading_start
+        self.mapped.append(key)
+        self.current = _SectionText()
+        self.sections[key] = self.current
+
+    def _content(self, chunk: str):
+        if self.current is not None:
+            self.current.feed(chunk)
+
+    def _heading(self, heading: str, consumed: str):
+        self.detected = True
+        if self.open_span is not None:
+            self.spans.append((self.open_span, self.heading_start))
+            self.open_span = None
+        key = _heading_key(heading)
+        if key:
+            self._open(key)
+        else:
+            if self.mapped:
+                self.open_span = self.heading_start
+            self._content(consumed)
+
+    def feed_line(self, line: str, has_newline: bool):
+        if self.pending is not None:
+            if not line.strip():
+                self._extend_pending(line, has_newline)
+                return
+            hash_line, _, _ = self.pending
+            self.pending = None
+            self._heading(line.strip(), f"{hash_line}\n{line}")
+            if has_newline:
+                self._content("\n")
+            return
+
+        self.heading_start = self.line_start
+        hashes = len(line) - len(line.lstrip("#"))
+        rest = line[hashes:]
+        if 1 <= hashes <= MAX_HEADING_HASHES and (rest[:1].isspace() or (not rest and has_newline)):
+            if rest.strip():
+                self._heading(rest.strip(), line)
+                if has_newline:
+                    self._content("\n")
+                return
+            self.pending = (line[:hashes], 0, False)
+            self._extend_pending(rest, has_newline)
+            return
+        self._content(line + "\n" if has_newline else line)
+
+    def _extend_pending(self, segment: str, has_newline: bool):
+        # Track whether a non-newline whitespace char exists past the first
+        # whitespace position: that is what lets the regex still match at EOF.
+        hash_line, length, matchable = self.pending
+        if segment and (length >= 1 or len(segment) >= 2):
+            matchable = True
+        length += len(segment) + (1 if has_newline else 0)
+        self.pending = (hash_line, length, matchable)
+
+    def finish(self):
+        if self.pending is not None:
+            hash_line, _, matchable = self.pending
+            self.pending = None
+            if matchable:
+                self.detected = True
+                if self.mapped and self.open_span is None:
+                    self.open_span = self.heading_start
+            self._content(hash_line)
+
+
+class _PlainState:
+    """Line-at-a-time equivalent of the first-occurrence keyword split."""
+
+    def __init__(self):
+        self.order = []
+        self.sections = {}
+        self.current = None
+        self.line_start = 0
+        self.first_offset = None
+
+    def feed_line(self, line: str):
+        if len(self.order) < len(HEADING_MAP):
+            position = 0
+            for match in _HEADING_RE.finditer(line):
+                key = match.lastgroup
+                if key in self.sections:
+                    continue
+                if self.current is not None:
+                    self.current.feed(line[position:match.start()])
+                position = match.start()
+                if self.first_offset is None:
+                    self.first_offset = self.line_start + position
+                self.current = _SectionText()
+                self.sections[key] = self.current
+                self.order.append(key)
+                if len(self.order) == len(HEADING_MAP):
+                    break
+            line = line[position:]
+        if self.current is not None:
+            self.current.feed(line)
+
+
+def _iter_lines(source):
+    """Yield ``(line, has_newline)`` pairs from a file object or any iterable of text chunks."""
+    buffer = ""
+    for chunk in source:
+        if "\n" not in chunk:
+            buffer += chunk
+            continue
+        lines = (buffer + chunk).split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line, True
+    if buffer:
+        yield buffer, False
+
+
+def _split_stream(source, spool) -> tuple[dict, dict, list]:
+    """Return sections, parser debug info and the ``(start, end)`` spans no section claimed."""
+    markdown = _MarkdownState()
+    plain = _PlainState()
+    position = 0
+    for line, has_newline in _iter_lines(source):
+        spool.write(line + "\n" if has_newline else line)
+        markdown.line_start = position
+        markdown.feed_line(line, has_newline)
+        if plain is not None:
+            if markdown.mapped:
+                # A mapped markdown heading means markdown sectioning wins.
+                plain = None
+            else:
+                plain.line_start = position
+                plain.feed_line(line + "\n" if has_newline else line)
+        position += len(line) + (1 if has_newline else 0)
+    markdown.finish()
+
+    sections = {key: "" for key in SECTION_ORDER}
+    debug = {"markdown_detected": markdown.detected, "mapped_headings": []}
+    first_offset = position
+    if markdown.mapped:
+        for key, text in markdown.sections.items():
+            sections[key] = text.text()
+        debug["mapped_headings"] = markdown.mapped
+        first_offset = markdown.first_offset
+    elif plain is not None:
+        for key, text in plain.sections.items():
+            sections[key] = text.text()
+        if plain.first_offset is not None:
+            first_offset = plain.first_offset
+    spans = [(0, first_offset)] if first_offset else []
+    if markdown.mapped:
+        spans += markdown.spans
+        if markdown.open_span is not None:
+            spans.append((markdown.open_span, position))
+    return sections, debug, spans
+
+
+def _read_spool(spool, size: int = -1) -> str:
+    spool.seek(0)
+    return spool.read(size)
+
+
+def _read_spans(spool, spans: list) -> str:
+    """Concatenate the given character spans of the spool, reading it once front to back."""
+    spool.seek(0)
+    parts = []
+    cursor = 0
+    for start, end in spans:
+        while cursor < start:
+            skipped = spool.read(min(start - cursor, SPOOL_MAX_BYTES))
+            if not skipped:
+                return "".join(parts)
+            cursor += len(skipped)
+        parts.append(spool.read(end - start))
+        cursor = end
+    return "".join(parts)
+
+
+def parse_brd_stream(source, use_llm: bool = True) -> dict:
+    """Parse a BRD from a text file object or iterable of text chunks.
+
+    Produces the same ``brd_sections_v1`` payload as ``parse_brd_text`` while
+    holding only the current line and the extracted sections in memory; the
+    raw text is spooled to disk in case the LLM fallback needs it.
+    ``use_llm=False`` keeps whatever the rule-based split found.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+", encoding="utf-8", newline="") as spool:
+        sections, debug, spans = _split_stream(source, spool)
+        payload = _sections_payload(sections, debug)
+        strategy = _choose_strategy(payload, lambda: _read_spans(spool, spans), use_llm)
+        if strategy == "llm_fallback":
+            return run_sync(_llm_fallback_async(_read_spool(spool), payload["_debug"]))
+        if strategy == "hybrid":
+            return run_sync(_hybrid_fill_async(payload, _read_spans(spool, spans)))
+    return _rule_based_result(payload)
+
+
+async def parse_brd_stream_async(source, use_llm: bool = True) -> dict:
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+", encoding="utf-8", newline="") as spool:
+        sections, debug, spans = _split_stream(source, spool)
+        payload = _sections_payload(sections, debug)
+        strategy = _choose_strategy(payload, lambda: _read_spans(spool, spans), use_llm)
+        if strategy == "llm_fallback":
+            return await _llm_fallback_async(_read_spool(spool), payload["_debug"])
+        if strategy == "hybrid":
+            return await _hybrid_fill_async(payload, _read_spans(spool, spans))
+    return _rule_based_result(payload)
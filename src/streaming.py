@@ -0,0 +1,62 @@
+import json
+
+
+class IncrementalJSONObject:
+    """Assemble a streamed JSON object and report top-level members as they close.
+
+    Leading prose or code fences before the first ``{`` are ignored. Each call
+    to :meth:`feed` scans only the new text, so total work is linear in the
+    length of the completion.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        members = []
+        text = self.buffer
+        while self._pos < len(text) and not self._done:
+            char = text[self._pos]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._member_start = self._pos + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    members.extend(self._close_member(text[self._member_start:self._pos]))
+                    self._done = True
+            elif char == "," and self._depth == 1:
+                members.extend(self._close_member(text[self._member_start:self._pos]))
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return members
+
+    @staticmethod
+    def _close_member(fragment: str) -> list:
+        if not fragment.strip():
+            return []
+        try:
+            return list(json.loads("{" + fragment + "}").items())
+        except json.JSONDecodeError:
+            return []
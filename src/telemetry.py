@@ -0,0 +1,174 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.config import LLM_PRICING, LLM_TELEMETRY_LOG
+
+
+# USD per million tokens: (input, cached input, output). Extend or override
+# with LLM_PRICING='{"model": [input, cached, output]}'.
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    **{model: tuple(prices) for model, prices in LLM_PRICING.items()},
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens", "hedge_prompt_tokens")
+
+_stage: ContextVar[str] = ContextVar("telemetry_stage", default="unknown")
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+@contextmanager
+def stage(name: str):
+    """Label every LLM call made in this context with ``name``."""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def current_stage() -> str:
+    return _stage.get()
+
+
+def _price(model: str) -> tuple | None:
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    # Dated snapshots (gpt-4o-mini-2024-07-18) are priced like their base model.
+    matches = [name for name in MODEL_PRICES if model.startswith(name + "-")]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float | None:
+    prices = _price(model or "")
+    if prices is None:
+        return None
+    input_price, cached_price, output_price = prices
+    return (
+        (prompt_tokens - cached_tokens) * input_price
+        + cached_tokens * cached_price
+        + completion_tokens * output_price
+    ) / 1_000_000
+
+
+def _inc(name: str, labels: tuple, amount: float = 1):
+    key = (name, labels)
+    _counters[key] = _counters.get(key, 0) + amount
+
+
+def _observe(name: str, labels: tuple, value: float):
+    key = (name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        histogram = _histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if value <= bound:
+            histogram["buckets"][index] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+
+def increment(name: str, labels: tuple = (), amount: float = 1):
+    """Bump a process-wide counter outside of call records (e.g. coalesced requests)."""
+    with _lock:
+        _inc(name, labels, amount)
+
+
+def observe(record: dict):
+    """Fold one finished call record into the process-wide metrics and the span log."""
+    labels = (("stage", record["stage"]), ("model", record["model"]))
+    with _lock:
+        _inc("brd_llm_calls_total", labels + (("cache", record["cache"]), ("status", record["status"])))
+        for field in TOKEN_FIELDS:
+            if record.get(field):
+                _inc("brd_llm_tokens_total", labels + (("kind", field.removesuffix("_tokens")),), record[field])
+        if record.get("retries"):
+            _inc("brd_llm_retries_total", labels, record["retries"])
+        if record.get("hedged"):
+            _inc("brd_llm_hedges_total", labels + (("outcome", "won" if record.get("hedge_won") else "lost"),))
+        elif record.get("hedge_capped"):
+            _inc("brd_llm_hedges_total", labels + (("outcome", "capped"),))
+        elif record.get("hedge_rate_limited"):
+            _inc("brd_llm_hedges_total", labels + (("outcome", "rate_limited"),))
+        if record.get("cost_usd"):
+            _inc("brd_llm_cost_usd_total", labels, record["cost_usd"])
+        _observe("brd_llm_latency_seconds", labels, record["seconds"])
+        if record.get("ttfb_seconds") is not None:
+            _observe("brd_llm_ttfb_seconds", labels, record["ttfb_seconds"])
+    if LLM_TELEMETRY_LOG:
+        span = {"timestamp": time.time(), **record}
+        with _lock, open(LLM_TELEMETRY_LOG, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(span) + "\n")
+
+
+def summarize(calls_by_stage: dict) -> dict:
+    """Per-BRD rollup of call records, by stage and in total."""
+    def rollup(calls: list) -> dict:
+        return {
+            "calls": len(calls),
+            "cache_hits": sum(1 for call in calls if call["cache"] == "hit"),
+            "coalesced": sum(1 for call in calls if call["cache"] == "coalesced"),
+            "errors": sum(1 for call in calls if call.get("status") in ("error", "timeout")),
+            "timeouts": sum(1 for call in calls if call.get("status") == "timeout"),
+            "retries": sum(call.get("retries", 0) for call in calls),
+            "hedged": sum(1 for call in calls if call.get("hedged")),
+            "hedge_wins": sum(1 for call in calls if call.get("hedge_won")),
+            **{field: sum(call.get(field, 0) for call in calls) for field in TOKEN_FIELDS},
+            "cost_usd": round(sum(call.get("cost_usd") or 0 for call in calls), 6),
+            "latency_seconds": round(sum(call.get("seconds", 0) for call in calls), 3),
+            "max_ttfb_seconds": max(
+                (call["ttfb_seconds"] for call in calls if call.get("ttfb_seconds") is not None), default=None
+            ),
+        }
+
+    stages = {name: rollup(calls) for name, calls in calls_by_stage.items()}
+    return {
+        "stages": stages,
+        "total": rollup([call for calls in calls_by_stage.values() for call in calls]),
+    }
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def prometheus_text() -> str:
+    """Render the process-wide metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), histogram in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
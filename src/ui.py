@@ -1,18 +1,22 @@
+import hashlib
 import json
 import sys
+import threading
+import time
 from io import BytesIO
 
 import os
 from pathlib import Path
 import streamlit as st
 from dotenv import load_dotenv
-from jsonschema import validate, ValidationError
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from src.orchestrator import run_pipeline
-from src.parser import parse_brd_text
+from src import schema_registry
+from src.llm import submit
+from src.orchestrator import STAGES, run_pipeline_async
+from src.parser import parse_brd_text_async
 
 
 env_path = Path(__file__).resolve().parents[1] / ".env"
@@ -26,16 +30,13 @@ with st.sidebar:
     st.header("Upload BRD")
     brd_file = st.file_uploader("BRD file (.md/.txt)", type=["md", "txt"])
     st.info("PDF parsing not enabled in the Python version yet.")
+    draft_mode = st.checkbox("Draft mode (heuristic artifacts, no LLM)")
     process = st.button("Process")
 
 
 def read_text(file_obj: BytesIO) -> str:
     return file_obj.getvalue().decode("utf-8", errors="ignore")
 
-def load_schema(name: str) -> dict:
-    schema_path = Path(__file__).resolve().parents[1] / "schemas" / name
-    return json.loads(schema_path.read_text(encoding="utf-8"))
-
 def compute_parser_metrics(brd_sections: dict) -> dict:
     sections = brd_sections.get("sections", {})
     non_empty = 0
@@ -54,11 +55,7 @@ def compute_parser_metrics(brd_sections: dict) -> dict:
     }
 
 def validate_schema(payload: dict, schema_name: str) -> dict:
-    try:
-        validate(instance=payload, schema=load_schema(schema_name))
-        return {"valid": True, "error": ""}
-    except ValidationError as exc:
-        return {"valid": False, "error": str(exc).splitlines()[0]}
+    return schema_registry.validation_summary(schema_name, payload)
 
 def compute_quality_metrics(artifacts: dict) -> dict:
     total_fields = 0
@@ -135,38 +132,152 @@ def compute_faithfulness_metrics(raw_text: str, artifacts: dict) -> dict:
         "helpfulness_pct": helpfulness,
     }
 
-if "artifacts" not in st.session_state:
-    st.session_state["artifacts"] = None
-if "brd_sections" not in st.session_state:
-    st.session_state["brd_sections"] = None
-if "raw_text" not in st.session_state:
-    st.session_state["raw_text"] = ""
+for state_key, default in {"artifacts": None, "brd_sections": None, "raw_text": "", "metrics": None}.items():
+    if state_key not in st.session_state:
+        st.session_state[state_key] = default
+
+# Jobs live in a process-wide store shared by every session, keyed by the
+# content hash of the uploaded BRD: re-uploading the same file reuses the
+# finished (or still running) job instead of calling the LLM again. Failed
+# jobs and jobs with degraded (``_error``) artifacts are retried instead.
+MAX_JOBS = 32
+POLL_SECONDS = 0.5
+
+
+@st.cache_resource
+def job_store() -> dict:
+    return {"jobs": {}, "lock": threading.Lock()}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def run_job(raw_text: str, progress: dict, mode: str = "llm") -> dict:
+    progress["phase"] = "parsing"
+    brd_sections = await parse_brd_text_async(raw_text, use_llm=mode == "llm")
+    progress["phase"] = "generating"
+    started = time.perf_counter()
+
+    def on_partial(stage, key, value):
+        progress["stages"][stage]["status"] = "streaming"
+        progress["partials"][stage][key] = value
+
+    def on_stage(stage, output):
+        progress["stages"][stage].update(
+            {"status": "error" if output.get("_error") else "done", "seconds": round(time.perf_counter() - started, 2)}
+        )
+
+    artifacts = await run_pipeline_async(brd_sections, on_partial=on_partial, on_stage=on_stage, mode=mode)
+    progress["phase"] = "done"
+    return {"raw_text": raw_text, "brd_sections": brd_sections, "artifacts": artifacts}
+
+
+def reusable(job: dict) -> bool:
+    future = job["future"]
+    if not future.done():
+        return True
+    if future.exception() is not None:
+        return False
+    artifacts = future.result()["artifacts"]
+    return not any(artifacts.get(name, {}).get("_error") for name in STAGES)
+
+
+def start_job(key: str, raw_text: str, mode: str = "llm") -> dict:
+    store = job_store()
+    with store["lock"]:
+        job = store["jobs"].get(key)
+        if job is not None and reusable(job):
+            job["requests"] += 1
+            return job
+        progress = {
+            "phase": "queued",
+            "stages": {name: {"status": "pending", "seconds": ""} for name in STAGES},
+            "partials": {name: {} for name in STAGES},
+        }
+        job = {"progress": progress, "requests": 1, "created": time.time()}
+        job["future"] = submit(run_job(raw_text, progress, mode))
+        store["jobs"][key] = job
+        overflow = len(store["jobs"]) - MAX_JOBS
+        if overflow > 0:
+            finished = sorted((item["created"], name) for name, item in store["jobs"].items() if item["future"].done())
+            for _, name in finished[:overflow]:
+                del store["jobs"][name]
+        return job
+
+
+def result_metrics(job: dict) -> dict:
+    """Metrics for one finished job; computed once and kept on the job, so they go when it is evicted."""
+    if "metrics" not in job:
+        result = job["future"].result()
+        artifacts = result["artifacts"]
+        validation = {"brd_sections": validate_schema(result["brd_sections"], "brd_sections.schema.json")}
+        validation.update(artifacts.get("_debug", {}).get("validation", {}))
+        job["metrics"] = {
+            "parser": compute_parser_metrics(result["brd_sections"]),
+            "validation": validation,
+            "quality": compute_quality_metrics(artifacts),
+            "faithfulness": compute_faithfulness_metrics(result["raw_text"], artifacts),
+        }
+    return job["metrics"]
+
+
+def render_progress(job: dict):
+    progress = job["progress"]
+    st.subheader("Generating Artifacts")
+    st.caption(f"Phase: {progress['phase']}")
+    st.table(
+        [
+            {"agent": name, "status": stage["status"], "seconds": stage["seconds"], "keys": len(progress["partials"][name])}
+            for name, stage in progress["stages"].items()
+        ]
+    )
+    for name, partial in progress["partials"].items():
+        if partial and progress["stages"][name]["status"] == "streaming":
+            with st.expander(f"{name} (streaming)"):
+                st.json(partial)
+
 
 if process:
     api_key = os.getenv("OPENAI_API_KEY", "")
-    if not api_key:
+    offline = draft_mode or os.getenv("LLM_BACKEND") == "mock"
+    if not api_key and not offline:
         st.error("OPENAI_API_KEY is not set. Add it to your .env and restart Streamlit.")
         st.stop()
-    if api_key in {"YOUR_KEY", "sk-your-key"} or not api_key.startswith("sk-"):
+    if not offline and (api_key in {"YOUR_KEY", "sk-your-key"} or not api_key.startswith("sk-")):
         st.error("OPENAI_API_KEY looks invalid. Update your .env with a real key and restart.")
         st.stop()
     if not brd_file:
         st.warning("Upload a .md or .txt BRD file to continue.")
     else:
-        with st.spinner("Processing BRD and generating artifacts..."):
-            raw_text = read_text(brd_file)
-            brd_sections = parse_brd_text(raw_text)
-            artifacts = run_pipeline(brd_sections)
-        st.session_state["brd_sections"] = brd_sections
-        st.session_state["artifacts"] = artifacts
-        st.session_state["raw_text"] = raw_text
-        st.success("Artifacts generated.")
+        mode = "draft" if draft_mode else "llm"
+        key = f"{mode}:{content_hash(brd_file.getvalue())}"
+        start_job(key, read_text(brd_file), mode)
+        st.session_state["job_key"] = key
+
+job = job_store()["jobs"].get(st.session_state.get("job_key", ""))
+if job is not None and not job["future"].done():
+    render_progress(job)
+    time.sleep(POLL_SECONDS)
+    st.rerun()
+if job is not None:
+    error = job["future"].exception()
+    if error is not None:
+        st.error(f"Processing failed: {error}")
+    else:
+        result = job["future"].result()
+        st.session_state["brd_sections"] = result["brd_sections"]
+        st.session_state["artifacts"] = result["artifacts"]
+        st.session_state["raw_text"] = result["raw_text"]
+        st.session_state["metrics"] = result_metrics(job)
+        if job["requests"] > 1:
+            st.caption("Served from an earlier run of the same file.")
 
 if st.session_state.get("brd_sections"):
     st.subheader("Parsed BRD Sections")
     st.json(st.session_state["brd_sections"])
     st.subheader("Parsing Metrics")
-    st.json(compute_parser_metrics(st.session_state["brd_sections"]))
+    st.json(st.session_state["metrics"]["parser"])
 
 if st.session_state.get("artifacts"):
     artifacts = st.session_state["artifacts"]
@@ -180,7 +291,8 @@ if st.session_state.get("artifacts"):
         "tech_stack_recommendations",
     ]:
         if isinstance(artifacts.get(key), dict) and artifacts[key].get("_error"):
-            errors.append(f"{key}: {artifacts[key]['_error']}")
+            source = " (draft fallback)" if artifacts[key].get("_fallback") == "draft" else ""
+            errors.append(f"{key}{source}: {artifacts[key]['_error']}")
 
     if errors:
         st.error("One or more agents failed and returned fallbacks:")
@@ -213,33 +325,20 @@ if st.session_state.get("artifacts"):
     st.table(status_rows)
 
     st.subheader("Schema Validation")
-    brd_validation = validate_schema(st.session_state.get("brd_sections", {}), "brd_sections.schema.json")
-    plan_validation = validate_schema(artifacts.get("engineering_plan", {}), "engineering_plan.schema.json")
-    schedule_validation = validate_schema(artifacts.get("schedule_estimate", {}), "schedule_estimate.schema.json")
-    architecture_validation = validate_schema(artifacts.get("solution_architecture", {}), "solution_architecture.schema.json")
-    poc_validation = validate_schema(artifacts.get("poc_plan", {}), "poc_plan.schema.json")
-    tech_stack_validation = validate_schema(artifacts.get("tech_stack_recommendations", {}), "tech_stack.schema.json")
-    st.json(
-        {
-            "brd_sections": brd_validation,
-            "engineering_plan": plan_validation,
-            "schedule_estimate": schedule_validation,
-            "solution_architecture": architecture_validation,
-            "poc_plan": poc_validation,
-            "tech_stack_recommendations": tech_stack_validation,
-        }
-    )
+    st.json(st.session_state["metrics"]["validation"])
 
     if isinstance(debug, dict) and debug.get("timings"):
         st.subheader("Latency Metrics")
-        total_latency = round(sum(debug["timings"].values()), 3)
+        total_latency = debug.get("graph", {}).get("wall_seconds", round(sum(debug["timings"].values()), 3))
         st.json({"total_seconds": total_latency, **debug["timings"]})
+        if debug.get("graph"):
+            st.caption(f"Critical path: {' -> '.join(debug['graph']['critical_path'])}")
 
     st.subheader("Quality Metrics")
-    st.json(compute_quality_metrics(artifacts))
+    st.json(st.session_state["metrics"]["quality"])
 
     st.subheader("Faithfulness & Groundedness")
-    st.json(compute_faithfulness_metrics(st.session_state.get("raw_text", ""), artifacts))
+    st.json(st.session_state["metrics"]["faithfulness"])
 
     col1, col2 = st.columns(2)
     with col1:
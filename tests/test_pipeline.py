@@ -18,3 +18,771 @@ def test_parse_brd_text_extracts_sections():
     assert result["schema"] == "brd_sections_v1"
     assert result["sections"]["problem"]
     assert len(result["sections"]["objectives"]) > 0
+
+
+def test_parse_brd_text_matches_numbered_and_punctuated_headings():
+    text = (
+        "## 1. Problem\n"
+        "Reports are late.\n\n"
+        "## 2) Goals:\n"
+        "- Faster reports\n\n"
+        "## 3. Non Functional Requirements\n"
+        "- 99.9% uptime\n"
+    )
+    result = parse_brd_text(text)
+    assert result["_debug"]["mapped_headings"] == ["problem", "objectives", "non_functional_requirements"]
+    assert result["sections"]["non_functional_requirements"] == ["99.9% uptime"]
+
+
+def test_parse_brd_stream_matches_parse_brd_text_for_any_chunking():
+    from pathlib import Path
+
+    from src.stream_parser import parse_brd_stream
+
+    root = Path(__file__).resolve().parents[1]
+    texts = [path.read_text(encoding="utf-8") for path in sorted((root / "sample_inputs").glob("*.md"))]
+    texts.append("Problem:\nSlow triage.\nGoals: faster\n#\n\n## Constraints\n- Budget\n")
+    for text in texts:
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        assert parse_brd_stream(chunks, use_llm=False) == parse_brd_text(text, use_llm=False)
+
+
+def test_run_pipeline_runs_independent_chains_in_parallel(monkeypatch):
+    import asyncio
+
+    from src import orchestrator
+
+    async def slow_agent(payload, on_partial=None):
+        await asyncio.sleep(0.2)
+        return {}
+
+    for stage in orchestrator.STAGES.values():
+        monkeypatch.setitem(stage, "agent", slow_agent)
+
+    result = orchestrator.run_pipeline({"schema": "brd_sections_v1", "sections": {}}, max_workers=3)
+    graph = result["_debug"]["graph"]
+    assert graph["wall_seconds"] < 0.7
+    assert len(graph["critical_path"]) == 2
+    assert result["_debug"]["timings"]["schedule_estimate_seconds"] >= 0.2
+
+
+def test_run_sync_refuses_to_block_the_shared_loop():
+    import asyncio
+
+    import pytest
+
+    from src.llm import run_sync
+
+    async def nested():
+        with pytest.raises(RuntimeError, match="await the coroutine"):
+            run_sync(asyncio.sleep(0))
+        return "ok"
+
+    assert run_sync(nested()) == "ok"
+
+
+def test_concurrent_pipelines_share_one_event_loop(monkeypatch):
+    import asyncio
+    import time
+
+    from src import orchestrator
+
+    async def slow_agent(payload, on_partial=None):
+        await asyncio.sleep(0.2)
+        return {"source": payload.get("sections", {}).get("problem", "")}
+
+    for stage in orchestrator.STAGES.values():
+        monkeypatch.setitem(stage, "agent", slow_agent)
+
+    async def both():
+        runs = [{"schema": "brd_sections_v1", "sections": {"problem": problem}} for problem in ("first", "second")]
+        return await asyncio.gather(*(orchestrator.run_pipeline_async(run, max_workers=5) for run in runs))
+
+    started = time.perf_counter()
+    first, second = asyncio.run(both())
+    # Each run is two 0.2s stages deep; run back to back they would take 0.8s.
+    assert time.perf_counter() - started < 0.7
+    assert first["engineering_plan"]["source"] == "first"
+    assert second["tech_stack_recommendations"]["source"] == "second"
+
+
+def test_response_cache_expires_and_evicts_least_recently_used(tmp_path):
+    from src.cache import ResponseCache, cache_key
+    from src.clients import DEFAULT_BASE_URL, MOCK_BASE_URL
+
+    # The same request against different backends never shares an entry.
+    request = ("gpt-4o-mini", "system", 0.3, "prompt", None)
+    assert cache_key(*request, MOCK_BASE_URL) != cache_key(*request, DEFAULT_BASE_URL)
+
+    store = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10, ttl_seconds=60)
+    store.put("a", "12345")
+    store.put("b", "67890")
+    assert store.get("a") == "12345"
+    store.put("c", "abcde")
+    assert store.get("b") is None
+    assert store.get("a") == "12345"
+
+    expired = ResponseCache(str(tmp_path / "expired.sqlite"), max_bytes=100, ttl_seconds=0.000001)
+    expired.put("a", "value")
+    assert expired.get("a") is None
+
+
+def test_incremental_json_reports_top_level_members_as_they_close():
+    from src.streaming import IncrementalJSONObject
+
+    assembler = IncrementalJSONObject()
+    assert assembler.feed('Here you go: {"summary": "a, b", "comp') == [("summary", "a, b")]
+    assert assembler.feed('onents": [{"name": "x}"}], ') == [("components", [{"name": "x}"}])]
+    assert assembler.feed('"open_questions": []}') == [("open_questions", [])]
+
+
+def test_run_batch_streams_jsonl_and_resumes(tmp_path, monkeypatch):
+    import json
+
+    from src import batch
+    from src.llm import run_sync
+
+    async def fake_pipeline(brd_sections, **options):
+        return {"brd_sections": brd_sections}
+
+    monkeypatch.setattr(batch, "run_pipeline_async", fake_pipeline)
+    for index in range(3):
+        (tmp_path / f"brd_{index}.md").write_text("# Problem\nSlow\n# Objectives\n- Faster\n", encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+
+    summary = run_sync(batch.run_batch([str(tmp_path / "*.md")], output, workers=2))
+    assert summary["processed"] == 3
+    assert [json.loads(line)["status"] for line in output.read_text().splitlines()] == ["ok"] * 3
+
+    summary = run_sync(batch.run_batch([str(tmp_path)], output, workers=2))
+    assert summary["skipped"] == 3 and summary["processed"] == 0
+
+
+def test_adaptive_rate_limiter_halves_window_on_rate_limit_and_grows_on_success():
+    import httpx
+    import openai
+
+    from src.ratelimit import AdaptiveRateLimiter
+
+    limiter = AdaptiveRateLimiter(initial_concurrency=8, max_concurrency=16, latency_target=10)
+    request = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "2"}, request=request)
+    limiter.on_error(openai.RateLimitError("slow down", response=response, body=None))
+    assert limiter.snapshot()["concurrency_limit"] == 4
+    limiter.on_success(0.5)
+    assert limiter.snapshot()["concurrency_limit"] == 4.25
+    assert limiter.snapshot()["rate_limited"] == 1
+
+
+def test_run_pipeline_reuses_stages_whose_inputs_did_not_change(monkeypatch):
+    from src import orchestrator
+
+    calls = []
+
+    def fake_agent(name):
+        async def agent(payload, on_partial=None):
+            calls.append(name)
+            return {"source": name}
+        return agent
+
+    for name, stage in orchestrator.STAGES.items():
+        monkeypatch.setitem(stage, "agent", fake_agent(name))
+
+    first = orchestrator.run_pipeline({"schema": "brd_sections_v1", "sections": {"constraints": ["a"]}})
+    calls.clear()
+    second = orchestrator.run_pipeline(
+        {"schema": "brd_sections_v1", "sections": {"constraints": ["a"]}, "_debug": {"strategy": "rule_based"}},
+        previous=first,
+    )
+    assert calls == []
+    assert second["_debug"]["incremental"]["reused_stages"] == list(orchestrator.STAGES)
+
+    third = orchestrator.run_pipeline({"schema": "brd_sections_v1", "sections": {"constraints": ["b"]}}, previous=first)
+    assert third["_debug"]["incremental"]["changed_sections"] == ["constraints"]
+    assert "engineering_plan" in third["_debug"]["incremental"]["rerun_stages"]
+
+    # Only stages that read the changed section re-run (the tech stack ignores
+    # assumptions); schedule and PoC are reused because the fake upstream
+    # artifacts come back unchanged.
+    fourth = orchestrator.run_pipeline(
+        {"schema": "brd_sections_v1", "sections": {"constraints": ["a"], "assumptions": ["new"]}}, previous=first
+    )
+    assert fourth["_debug"]["incremental"]["rerun_stages"] == ["engineering_plan", "solution_architecture"]
+
+
+def test_schema_registry_matches_jsonschema_validate():
+    import jsonschema
+    import pytest
+
+    from src import schema_registry
+    from src.fallback import eng_plan_fallback
+
+    plan = eng_plan_fallback()
+    assert schema_registry.is_valid("engineering_plan", plan)
+    assert schema_registry.first_error("engineering_plan.schema.json", plan) is None
+
+    broken = {**plan, "phases": "not a list"}
+    assert not schema_registry.is_valid("engineering_plan", broken)
+    with pytest.raises(jsonschema.ValidationError) as expected:
+        jsonschema.validate(broken, schema_registry.get_schema("engineering_plan"))
+    assert str(schema_registry.first_error("engineering_plan", broken)) == str(expected.value)
+
+
+def test_mock_llm_transport_serves_canned_agent_json():
+    import asyncio
+    import json
+
+    import httpx
+    from openai import AsyncOpenAI
+
+    from src import schema_registry
+    from src.agents import _schedule_prompt
+    from src.mock_llm import MockLLMTransport, parse_latency
+
+    assert parse_latency("fixed:250")(None) == 0.25
+
+    async def ask():
+        client = AsyncOpenAI(
+            api_key="sk-mock",
+            base_url="http://mock-llm.invalid/v1",
+            http_client=httpx.AsyncClient(transport=MockLLMTransport(latency="fixed:0", seed=1)),
+            max_retries=0,
+        )
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": _schedule_prompt({"phases": []})}],
+        )
+        return json.loads(response.choices[0].message.content), response.usage.total_tokens
+
+    schedule, total_tokens = asyncio.run(ask())
+    assert schema_registry.is_valid("schedule_estimate", schedule)
+    assert total_tokens > 0
+
+
+def test_telemetry_rollup_cost_and_prometheus_export():
+    from src import telemetry
+
+    assert telemetry.estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0, cached_tokens=1_000_000) == 0.075
+    assert telemetry.estimate_cost("unknown-model", 10, 10) is None
+
+    telemetry.reset()
+    calls = [
+        {"stage": "poc_plan", "model": "gpt-4o-mini", "cache": "miss", "status": "ok", "retries": 1,
+         "prompt_tokens": 100, "completion_tokens": 50, "cached_tokens": 0, "cost_usd": 0.1,
+         "seconds": 0.4, "ttfb_seconds": 0.2},
+        {"stage": "poc_plan", "model": "gpt-4o-mini", "cache": "hit", "status": "ok", "retries": 0, "seconds": 0.01},
+    ]
+    for call in calls:
+        telemetry.observe(call)
+    summary = telemetry.summarize({"poc_plan": calls})
+    assert summary["total"]["calls"] == 2
+    assert summary["total"]["cache_hits"] == 1
+    assert summary["stages"]["poc_plan"]["prompt_tokens"] == 100
+
+    text = telemetry.prometheus_text()
+    assert 'brd_llm_retries_total{stage="poc_plan",model="gpt-4o-mini"} 1' in text
+    assert 'brd_llm_latency_seconds_bucket{stage="poc_plan",model="gpt-4o-mini",le="0.5"} 2' in text
+    assert 'brd_llm_ttfb_seconds_count{stage="poc_plan",model="gpt-4o-mini"} 1' in text
+
+
+def test_project_and_fit_to_budget_are_deterministic():
+    from src.projection import compact_json, fit_to_budget, project
+    from src.ratelimit import estimate_tokens
+
+    payload = {"schema": "brd_sections_v1", "sections": {"problem": "p", "constraints": ["c"]}, "_debug": {"x": 1}}
+    assert project(payload, ["sections.problem", "sections.missing"]) == {"sections": {"problem": "p"}}
+
+    big = {"requirements": [f"requirement {index} " + "x" * 200 for index in range(300)]}
+    trimmed, report = fit_to_budget(big, 1000)
+    assert report["truncated"] and estimate_tokens(compact_json(trimmed)) <= 1000
+    assert trimmed["requirements"][-1].endswith("more omitted)")
+    assert fit_to_budget(big, 1000) == (trimmed, report)
+
+
+def test_llm_parse_maps_chunks_and_merges_deduplicated_sections(monkeypatch):
+    import asyncio
+
+    from src import parser
+
+    prompts = []
+
+    async def fake_complete(prompt, temperature, parse, on_partial=None, **options):
+        prompts.append(prompt)
+        part = prompt.split("(part ")[1].split(" ")[0]
+        return {"sections": {"problem": "Slow close", "objectives": ["Automate close.", f"Objective {part}"]}}
+
+    monkeypatch.setattr(parser, "complete_async", fake_complete)
+    monkeypatch.setattr(parser, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(parser, "PARSER_CHUNK_CHARS", 200)
+    text = "\n\n".join(f"Paragraph {index} " + "words " * 20 for index in range(10))
+
+    chunks = parser._chunk_paragraphs(text, 200)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert "\n\n".join(chunks) == text
+
+    payload = asyncio.run(parser._llm_parse_async(text))
+    assert len(prompts) == len(chunks)
+    assert payload["sections"]["problem"] == "Slow close"
+    assert payload["sections"]["objectives"][0] == "Automate close."
+    assert len(payload["sections"]["objectives"]) == 1 + len(chunks)
+
+
+def test_hybrid_parse_fills_only_missing_sections_from_unassigned_text(monkeypatch):
+    from src import parser
+    from src.stream_parser import parse_brd_stream
+
+    prompts = []
+
+    async def fake_complete(prompt, temperature, parse, on_partial=None, **options):
+        prompts.append(prompt)
+        return {"sections": {"dependencies": ["Payments API"], "problem": "ignored"}}
+
+    monkeypatch.setattr(parser, "complete_async", fake_complete)
+    monkeypatch.setattr(parser, "OPENAI_API_KEY", "sk-test")
+    text = (
+        "Intro: we depend on the Payments API.\n\n"
+        "## Problem\nManual recon is slow.\n\n"
+        "## Objectives\n- Faster close\n"
+    )
+
+    payload = parser.parse_brd_text(text)
+    assert payload["sections"]["problem"] == "Manual recon is slow."
+    assert payload["sections"]["dependencies"] == ["Payments API"]
+    assert payload["_debug"]["strategy"] == "hybrid"
+    assert payload["_debug"]["section_sources"]["objectives"] == "rule_based"
+    assert payload["_debug"]["section_sources"]["dependencies"] == "llm"
+    assert payload["_debug"]["section_sources"]["constraints"] == "missing"
+    assert "Input BRD text:\nIntro: we depend on the Payments API.\n\n" == prompts[0][prompts[0].index("Input BRD"):]
+    assert '"problem"' not in prompts[0].split("Input BRD")[0]
+
+    assert parse_brd_stream(iter([text[:7], text[7:]])) == payload
+
+    # Text under an unrecognised heading between sections is unassigned too.
+    prompts.clear()
+    between = (
+        "## Problem\nManual recon is slow.\n\n"
+        "## Background\nWe depend on the Payments API for settlement data.\n\n"
+        "## Objectives\n- Faster close\n"
+    )
+    payload = parser.parse_brd_text(between)
+    assert payload["_debug"]["strategy"] == "hybrid"
+    assert prompts[0].endswith("Input BRD text:\n## Background\nWe depend on the Payments API for settlement data.\n\n")
+    assert parse_brd_stream(iter([between[:11], between[11:]])) == payload
+
+    # A title line alone is not unassigned content worth an LLM call.
+    prompts.clear()
+    titled = "# Vendor Portal BRD\n\n" + text[text.index("## Problem"):]
+    assert parser.parse_brd_text(titled)["_debug"]["strategy"] == "rule_based"
+    assert prompts == []
+
+
+def test_extract_json_tolerates_fences_and_prose():
+    import json
+
+    import pytest
+
+    from src.json_extract import extract_json
+    from src.llm import response_format
+
+    assert extract_json('{"a": 1}') == {"a": 1}
+    assert extract_json('Here you go:\n```json\n{"a": {"b": [1, "}"]}}\n```\nThanks!') == {"a": {"b": [1, "}"]}}
+    assert extract_json('Note {not json} then {"x": 2} trailing') == {"x": 2}
+    with pytest.raises(json.JSONDecodeError):
+        extract_json("no object here")
+    for broken in ('{"phases": [{"name": "a"}], "risks": [oops]}', '```json\n{"phases": [{"name": "a"}, {"na'):
+        with pytest.raises(json.JSONDecodeError):
+            extract_json(broken)
+
+    option = response_format({"type": "object"}, "poc_plan")
+    assert option["type"] == "json_schema"
+    assert option["json_schema"]["name"] == "poc_plan"
+
+
+def test_artifact_writer_streams_profiles_and_gzip(tmp_path):
+    import json
+
+    from src.output import ArtifactWriter, open_text, read_json
+
+    result = {
+        "brd_sections": {"sections": {"problem": "p"}},
+        "poc_plan": {"poc_goal": "g", "risks": ["r"]},
+        "_fingerprints": {"stages": {}},
+        "_debug": {"timings": {}},
+    }
+    path = tmp_path / "out.json.gz"
+    with open_text(path, "w") as handle:
+        writer = ArtifactWriter(handle, profile="compact")
+        writer.write("poc_plan", result["poc_plan"])
+        writer.finish(result)
+    assert read_json(path) == {key: value for key, value in result.items() if key != "_debug"}
+
+    with open_text(tmp_path / "full.json", "w") as handle:
+        writer = ArtifactWriter(handle)
+        writer.finish(result)
+    assert (tmp_path / "full.json").read_text(encoding="utf-8") == json.dumps(result, indent=2) + "\n"
+
+    with open_text(tmp_path / "artifacts.json", "w") as handle:
+        ArtifactWriter(handle, profile="artifacts", indent=0).finish(result)
+    assert read_json(tmp_path / "artifacts.json") == {"poc_plan": result["poc_plan"]}
+
+
+def test_draft_mode_builds_schema_valid_artifacts_without_llm_calls():
+    from src import schema_registry
+    from src.orchestrator import STAGES, run_pipeline
+
+    brd_sections = parse_brd_text(
+        "## Problem\nTickets are triaged by hand.\n\n"
+        "## Functional Requirements\n- Ingest email\n- Classify severity\n- Route to teams\n- Show a dashboard\n\n"
+        "## Non-Functional Requirements\n- 99.9% uptime\n\n"
+        "## Dependencies\n- Zendesk API\n",
+        use_llm=False,
+    )
+    artifacts = run_pipeline(brd_sections, mode="draft")
+    assert artifacts["_debug"]["mode"] == "draft"
+    assert artifacts["_debug"]["telemetry"]["total"]["calls"] == 0
+    for name in STAGES:
+        assert schema_registry.is_valid(name, artifacts[name]), name
+    assert artifacts["schedule_estimate"]["timeline_weeks"] > 0
+    assert "Zendesk Api Adapter" in [c["name"] for c in artifacts["solution_architecture"]["components"]]
+
+
+def test_http_service_queues_jobs_and_rejects_when_full():
+    import json
+    import threading
+    import urllib.error
+    import urllib.request
+
+    import pytest
+
+    from src.server import JobService, make_server
+
+    service = JobService(workers=1, queue_size=1)
+    server = make_server("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    def post(text):
+        request = urllib.request.Request(f"{base}/jobs?mode=draft", data=text.encode(), method="POST")
+        return urllib.request.urlopen(request)
+
+    try:
+        first = json.load(post("## Problem\nSlow triage\n"))
+        with pytest.raises(urllib.error.HTTPError) as rejected:
+            post("## Problem\nQueue is full\n")
+        assert rejected.value.code == 429
+        assert json.load(urllib.request.urlopen(f"{base}/queue"))["depth"] == 1
+
+        service.start()
+        service.queue.join()
+        status = json.load(urllib.request.urlopen(f"{base}/jobs/{first['id']}"))
+        assert status["status"] == "done"
+        result = json.load(urllib.request.urlopen(f"{base}/jobs/{first['id']}/result?profile=artifacts"))
+        assert result["engineering_plan"]["project_overview"] == "Slow triage"
+    finally:
+        server.shutdown()
+        service.stop()
+
+
+def test_http_service_rejects_malformed_submissions_with_400():
+    import http.client
+    import json
+    import threading
+
+    from src.server import JobService, make_server
+
+    service = JobService(workers=1, queue_size=4)
+    server = make_server("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    json_headers = {"Content-Type": "application/json"}
+    cases = [
+        (b"## Problem\nX\n", {"Content-Length": "abc"}),
+        (b"## Problem\nX\n", {"Content-Length": "-5"}),
+        (b'{"text": 5}', json_headers),
+        (b'{"text": null}', json_headers),
+        (b'["## Problem"]', json_headers),
+        (b'{"text": "## Problem\\nX", "mode": ["draft"]}', json_headers),
+    ]
+    try:
+        for body, headers in cases:
+            connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=5)
+            connection.putrequest("POST", "/jobs")
+            for name, value in {"Content-Length": str(len(body)), **headers}.items():
+                connection.putheader(name, value)
+            connection.endheaders(body)
+            response = connection.getresponse()
+            assert response.status == 400, body
+            assert json.loads(response.read())["error"]
+            connection.close()
+        assert service.queue_info()["totals"]["submitted"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_checkpointed_run_resumes_only_failed_stages(tmp_path, monkeypatch):
+    from src import orchestrator, runstore
+
+    calls = []
+    failing = {"poc_plan"}
+
+    def fake_agent(name):
+        async def agent(payload, on_partial=None):
+            calls.append(name)
+            if name in failing:
+                return {"_error": "boom"}
+            return {"source": name}
+        return agent
+
+    for name, stage in orchestrator.STAGES.items():
+        monkeypatch.setitem(stage, "agent", fake_agent(name))
+    store = runstore.RunStore(str(tmp_path / "runs.sqlite"))
+    text = "## Problem\nSlow triage\n\n## Constraints\n- EU only\n"
+
+    first = runstore.run_checkpointed(text, mode="llm", store=store)
+    run_id = first["_debug"]["run_store"]["run_id"]
+    assert store.get_run(run_id)["status"] == "partial"
+    assert set(store.load_stages(run_id)) == {"brd_sections", *orchestrator.STAGES}
+
+    calls.clear()
+    failing.clear()
+    resumed = runstore.resume(run_id, store=store)
+    assert calls == ["poc_plan"]
+    assert resumed["_debug"]["run_store"]["run_id"] == run_id
+    assert resumed["poc_plan"]["source"] == "poc_plan" and "_error" not in resumed["poc_plan"]
+    assert store.get_run(run_id)["status"] == "done"
+
+
+def test_identical_in_flight_prompts_share_one_llm_call(monkeypatch):
+    import asyncio
+    import json
+
+    from src import cache, llm, singleflight
+
+    requests = []
+
+    async def fake_create(prompt, temperature, on_partial, record, format_option=None):
+        requests.append(prompt)
+        await asyncio.sleep(0.05)
+        return '{"answer": "%s"}' % prompt
+
+    monkeypatch.setattr(llm, "_create_with_retries", fake_create)
+    monkeypatch.setattr(cache, "_mode", "bypass")
+
+    async def scenario():
+        with llm.track_calls() as calls:
+            results = await asyncio.gather(
+                *(llm.complete_async(prompt, 0.3, parse=json.loads) for prompt in ["a", "a", "a", "b"])
+            )
+        return results, calls
+
+    results, calls = llm.run_sync(scenario())
+    assert sorted(requests) == ["a", "b"]
+    assert [result["answer"] for result in results] == ["a", "a", "a", "b"]
+    assert results[0] is not results[1]
+    assert sorted(call["cache"] for call in calls) == ["bypass", "bypass", "coalesced", "coalesced"]
+    assert singleflight.prompts.inflight() == 0
+
+
+def test_hedged_call_returns_the_faster_duplicate_within_the_rate_cap(monkeypatch):
+    import asyncio
+
+    from src import llm
+    from src.hedging import HedgePolicy
+    from src.ratelimit import AdaptiveRateLimiter
+
+    limiter = AdaptiveRateLimiter(requests_per_minute=600, tokens_per_minute=100000)
+    monkeypatch.setattr(llm, "get_limiter", lambda: limiter)
+    policy = HedgePolicy(percentile=50, min_samples=3, max_rate=0.5, window=10)
+    for seconds in (0.01, 0.02, 0.03):
+        policy.record_latency("poc_plan", seconds)
+    policy.finish(hedged=False)
+    assert policy.delay("poc_plan") == 0.02
+    monkeypatch.setattr(llm, "get_hedge_policy", lambda: policy)
+
+    delays = [1.0, 0.01]
+
+    async def fake_create(prompt, temperature, on_partial=None, format_option=None):
+        delay = delays.pop(0) if delays else 1.0
+        await asyncio.sleep(delay)
+        return f"after {delay}", {"model": "test"}
+
+    monkeypatch.setattr(llm, "_create", fake_create)
+    record = {"stage": "poc_plan"}
+    content, _ = llm.run_sync(llm._create_hedged("p", 0.3, record))
+    assert content == "after 0.01"
+    assert record["hedged"] and record["hedge_won"]
+    # The hedge is a real request: it draws on the limiter and its prompt is accounted.
+    assert limiter.counters["hedges"] == 1 and record["hedge_prompt_tokens"] > 0
+
+    # At most half of the recent calls may be hedged; the next slow call is not duplicated.
+    delays[:] = [0.05]
+    record = {"stage": "poc_plan"}
+    content, _ = llm.run_sync(llm._create_hedged("p", 0.3, record))
+    assert content == "after 0.05" and record.get("hedge_capped")
+    assert policy.snapshot()["hedged"] == 1
+
+    # Without request budget left in the limiter the hedge is skipped, not queued.
+    policy.max_rate = 1.0
+    limiter.requests.tokens = 0
+    delays[:] = [0.05]
+    record = {"stage": "poc_plan"}
+    content, _ = llm.run_sync(llm._create_hedged("p", 0.3, record))
+    assert content == "after 0.05" and record.get("hedge_rate_limited") and not record.get("hedged")
+    assert policy._hedges_in_flight == 0
+
+
+def test_deadline_splits_budgets_and_falls_back_for_stages_out_of_time(monkeypatch):
+    import asyncio
+    import time
+
+    from src import cache, llm
+    from src.orchestrator import run_pipeline
+
+    async def fake_create(prompt, temperature, on_partial, record, format_option=None):
+        await asyncio.sleep(5 if record.get("stage") == "poc_plan" else 0.01)
+        return "{}"
+
+    monkeypatch.setattr(llm, "_create_with_retries", fake_create)
+    monkeypatch.setattr(cache, "_mode", "bypass")
+    brd_sections = parse_brd_text("## Functional Requirements\n- Export reports\n")
+
+    started = time.perf_counter()
+    artifacts = run_pipeline(brd_sections, deadline_seconds=0.5)
+    assert time.perf_counter() - started < 1.5
+
+    report = artifacts["_debug"]["deadline"]
+    assert report["timed_out_stages"] == ["poc_plan"]
+    # Each stage on the architecture -> PoC chain starts with half of what is left for it.
+    assert report["stages"]["solution_architecture"]["budget_seconds"] <= 0.25
+    assert artifacts["poc_plan"]["_error"] and artifacts["poc_plan"]["_fallback"] == "draft"
+    assert artifacts["_debug"]["degraded_stages"] == ["poc_plan"]
+    poc_calls = artifacts["_debug"]["telemetry"]["stages"]["poc_plan"]
+    assert poc_calls["errors"] == 1 and poc_calls["timeouts"] == 1
+    on_time = ("engineering_plan", "schedule_estimate", "tech_stack_recommendations")
+    assert not any(artifacts[name].get("_error") for name in on_time)
+
+
+def test_per_brd_telemetry_includes_parser_llm_calls(monkeypatch):
+    import json
+
+    from src import cache, llm, parser
+    from src.orchestrator import run_pipeline
+
+    async def fake_create(prompt, temperature, on_partial, record, format_option=None):
+        record.update({"model": "gpt-4o-mini", "prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 0})
+        return json.dumps({"schema": "brd_sections_v1", "sections": {"problem": "Slow invoice approval."}})
+
+    monkeypatch.setattr(llm, "_create_with_retries", fake_create)
+    monkeypatch.setattr(cache, "_mode", "bypass")
+    monkeypatch.setattr(parser, "OPENAI_API_KEY", "sk-test")
+
+    brd_sections = parser.parse_brd_text("Invoices wait weeks for approval and nobody owns the queue.")
+    assert brd_sections["_debug"]["strategy"] == "llm_fallback"
+    telemetry = run_pipeline(brd_sections, mode="draft")["_debug"]["telemetry"]
+    assert telemetry["stages"]["brd_parser"]["calls"] == 1
+    assert telemetry["total"]["calls"] == 1 and telemetry["total"]["prompt_tokens"] == 100
+
+
+def test_degraded_fallback_is_built_only_on_failure_and_survives_malformed_input(monkeypatch):
+    import json
+
+    from src import cache, draft, llm
+    from src.orchestrator import run_pipeline
+
+    plan = {"phases": [{"name": None, "objectives": 3}], "team_composition": [{"role": None, "count": "x"}]}
+
+    async def fake_create(prompt, temperature, on_partial, record, format_option=None):
+        if record["stage"] == "schedule_estimate":
+            raise RuntimeError("boom")
+        return json.dumps(plan) if record["stage"] == "engineering_plan" else "{}"
+
+    def no_draft(payload):
+        raise AssertionError("draft built for a successful stage")
+
+    monkeypatch.setattr(llm, "_create_with_retries", fake_create)
+    monkeypatch.setattr(cache, "_mode", "bypass")
+    monkeypatch.setattr(draft, "draft_poc", no_draft)
+
+    artifacts = run_pipeline(parse_brd_text("## Problem\nSlow close.\n", use_llm=False))
+    schedule = artifacts["schedule_estimate"]
+    assert schedule["_error"] == "boom" and schedule["_fallback"] == "draft"
+    assert schedule["phases"][0]["name"] == "Phase 1"
+    assert schedule["resource_matrix"] == [{"role": "", "count": 1, "allocation_percent": 50}]
+    assert not artifacts["poc_plan"].get("_error")
+
+
+def test_timeout_without_deadline_is_reraised_and_recorded_as_timeout(monkeypatch):
+    import json
+
+    import pytest
+
+    from src import cache, llm
+
+    async def fake_create(prompt, temperature, on_partial, record, format_option=None):
+        raise TimeoutError("read timed out")
+
+    monkeypatch.setattr(llm, "_create_with_retries", fake_create)
+    monkeypatch.setattr(cache, "_mode", "bypass")
+
+    async def scenario():
+        with llm.track_calls() as calls:
+            with pytest.raises(TimeoutError, match="read timed out"):
+                await llm.complete_async("p", 0.3, parse=json.loads)
+        return calls
+
+    calls = llm.run_sync(scenario())
+    assert calls[0]["status"] == "timeout"
+
+
+def test_sequential_llm_calls_reuse_one_pooled_connection(monkeypatch):
+    import json
+    import threading
+    import weakref
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from src import cache, clients, llm
+    from src.mock_llm import CANNED_RESPONSES
+
+    # The in-process mock transport opens no sockets, so the mock backend's
+    # canned answers are served over a real keep-alive HTTP server instead.
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            content = json.dumps(CANNED_RESPONSES["poc_plan"])
+            body = json.dumps({
+                "id": "local-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(clients, "LLM_BACKEND", "openai")
+    monkeypatch.setattr(clients, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(clients, "OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setattr(clients, "_clients", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(cache, "_mode", "bypass")
+
+    async def scenario():
+        with clients.track_connections() as connections:
+            for prompt in ("first", "second"):
+                await llm.complete_async(prompt, 0.3, parse=json.loads)
+        return connections
+
+    try:
+        connections = llm.run_sync(scenario())
+    finally:
+        server.shutdown()
+    assert connections == {"requests": 2, "opened": 1, "reused": 1}